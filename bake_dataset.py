@@ -0,0 +1,243 @@
+"""Sharded, memory-mapped training data for many bakes of a level.
+
+`ingest_bakes` converts bake directories (each a full set of SHCoefficients_* /
+AmbientVector textures, tagged with the light angle it was baked with) into row shards
+under one dataset directory:
+
+  manifest.json                 bake key -> source directory, angle, shard files
+  <key>_<index>.npy             float32 (rows, ROW_WIDTH): x, y, z, angle, 27 SH floats
+
+Rows are the probe centers of the bake in texture order (x fastest, z slowest), with
+UVW positions like the notebook's `pos_grid`. A bake's key is the SHA-256 of its texture
+files and its angle, so re-running the ingestion only converts new or re-baked directories.
+Conversion runs in a process pool and streams one group of depth slices at a time
+into `.npy` memory maps, so memory does not grow with the bake size.
+
+`ShardedSHDataset` memory-maps the shards and yields shuffled batches from a bounded
+window of shards at a time.
+"""
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from evaluate import probe_centers
+from sh_volume import SH_FLOAT_COUNT, SH_TEXTURE_LAYOUT
+from texture_sampler import load_texture_by_name
+
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# Row layout of a shard
+POS_COLUMNS = slice(0, 3)
+ANGLE_COLUMNS = slice(3, 4)
+SH_COLUMNS = slice(4, 4 + SH_FLOAT_COUNT)
+ROW_WIDTH = 4 + SH_FLOAT_COUNT
+
+DEFAULT_SHARD_ROWS = 1 << 20 # ~130 MB per shard
+
+
+def sh_file_hashes(bake_dir: str | Path) -> Dict[str, str]:
+  """SHA-256 (hex) of the .json and .bin of every SH texture of a bake, in SH_TEXTURE_LAYOUT order."""
+  hashes = {}
+  for file_name, _ in SH_TEXTURE_LAYOUT.values():
+    for suffix in (".json", ".bin"):
+      with open(Path(bake_dir) / (file_name + suffix), "rb") as f:
+        hashes[file_name + suffix] = hashlib.file_digest(f, "sha256").hexdigest()
+  return hashes
+
+
+def bake_key(bake_dir: str | Path, angle: float) -> str:
+  """Content hash of the SH textures of a bake, together with its light angle."""
+  digest = hashlib.sha256()
+  digest.update(np.float32(angle).tobytes())
+  for file_hash in sh_file_hashes(bake_dir).values():
+    digest.update(bytes.fromhex(file_hash))
+  return digest.hexdigest()
+
+
+def _convert_bake(bake_dir: str, angle: float, key: str, out_dir: str, shard_rows: int) -> List[dict]:
+  # Runs in a worker process. Textures are memory-mapped and decoded per depth slice.
+  textures = {
+    name: load_texture_by_name(bake_dir, file_name, mmap=True, cache=False)
+    for name, (file_name, _) in SH_TEXTURE_LAYOUT.items()
+  }
+  depth, height, width, _ = textures["AmbientVector"].data.shape
+  for name, tex in textures.items():
+    if tex.data.shape[:3] != (depth, height, width):
+      raise ValueError(f"{bake_dir}: {name} is {tex.data.shape[:3]}, expected {(depth, height, width)}")
+
+  slice_rows = height * width
+  slices_per_shard = max(1, shard_rows // slice_rows)
+  uv = probe_centers((1, height, width))[:, 0:2] # one depth slice
+  zs = probe_centers((depth, 1, 1))[:, 2]
+
+  shards = []
+  for index, z_start in enumerate(range(0, depth, slices_per_shard)):
+    z_stop = min(z_start + slices_per_shard, depth)
+    file_name = f"{key[:16]}_{index:04d}.npy"
+    tmp_path = Path(out_dir) / (file_name + ".tmp")
+    rows = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=((z_stop - z_start) * slice_rows, ROW_WIDTH))
+    for z in range(z_start, z_stop):
+      block = rows[(z - z_start) * slice_rows : (z - z_start + 1) * slice_rows]
+      block[:, 0:2] = uv
+      block[:, 2] = zs[z]
+      block[:, ANGLE_COLUMNS] = angle
+      sh = block[:, SH_COLUMNS]
+      for name, (_, channels) in SH_TEXTURE_LAYOUT.items():
+        sh[:, channels] = textures[name].data[z].reshape(slice_rows, -1)
+    rows.flush()
+    del rows
+    os.replace(tmp_path, Path(out_dir) / file_name)
+    shards.append({"file": file_name, "rows": (z_stop - z_start) * slice_rows})
+  return shards
+
+
+def _read_manifest(out_dir: Path) -> dict:
+  path = out_dir / MANIFEST_NAME
+  if not path.exists():
+    return {"version": MANIFEST_VERSION, "bakes": {}}
+  with open(path, "r", encoding="utf-8") as f:
+    manifest = json.load(f)
+  if manifest.get("version") != MANIFEST_VERSION:
+    raise ValueError(f"Unsupported dataset manifest version {manifest.get('version')}")
+  return manifest
+
+
+def _write_manifest(out_dir: Path, manifest: dict) -> None:
+  tmp_path = out_dir / (MANIFEST_NAME + ".tmp")
+  with open(tmp_path, "w", encoding="utf-8") as f:
+    json.dump(manifest, f, indent=2)
+  os.replace(tmp_path, out_dir / MANIFEST_NAME)
+
+
+def ingest_bakes(
+  bakes: Sequence[Tuple[str | Path, float]],
+  out_dir: str | Path,
+  shard_rows: int = DEFAULT_SHARD_ROWS,
+  workers: Optional[int] = None,
+) -> dict:
+  """Convert (bake directory, light angle) pairs into shards under `out_dir`, returns the manifest.
+
+  - Bakes whose key is already in the manifest (with all of its shard files present) are skipped.
+  - A re-baked directory (same directory and angle, new key) replaces its old entry, whose
+    shard files are deleted.
+  - Bakes that are no longer listed stay in the dataset; remove them from the manifest to drop them.
+  - workers: size of the process pool, None uses every CPU.
+  """
+  out_p = Path(out_dir)
+  out_p.mkdir(parents=True, exist_ok=True)
+  manifest = _read_manifest(out_p)
+
+  bakes = [(str(Path(bake_dir)), float(angle)) for bake_dir, angle in bakes]
+  with ProcessPoolExecutor(max_workers=workers) as pool:
+    keys = list(pool.map(bake_key, *zip(*bakes))) if bakes else []
+
+    pending = {}
+    for (bake_dir, angle), key in zip(bakes, keys):
+      entry = manifest["bakes"].get(key)
+      if entry is not None and all((out_p / s["file"]).exists() for s in entry["shards"]):
+        print(f"skipping {bake_dir} (angle {angle}): already converted")
+        continue
+      if key not in pending:
+        pending[key] = (bake_dir, angle, pool.submit(_convert_bake, bake_dir, angle, key, str(out_p), shard_rows))
+
+    for key, (bake_dir, angle, future) in pending.items():
+      shards = future.result()
+      # The previous conversion of a re-baked directory is replaced, not kept next to it
+      stale = [k for k, e in manifest["bakes"].items() if k != key and (e["dir"], e["angle"]) == (bake_dir, angle)]
+      stale_files = [s["file"] for k in stale for s in manifest["bakes"].pop(k)["shards"]]
+      manifest["bakes"][key] = {"dir": bake_dir, "angle": angle, "shards": shards}
+      _write_manifest(out_p, manifest)
+      for file_name in stale_files:
+        (out_p / file_name).unlink(missing_ok=True)
+      print(f"converted {bake_dir} (angle {angle}): {sum(s['rows'] for s in shards)} rows in {len(shards)} shards")
+
+  _write_manifest(out_p, manifest)
+  return manifest
+
+
+class ShardedSHDataset:
+  """Read-only view of an ingested dataset directory.
+
+  Shards are opened as read-only memory maps on first use. `iter_batches` loads at most
+  `window` shards into memory at a time, so RAM is bounded by `window * shard_rows` rows
+  no matter how many bakes the dataset holds.
+  """
+
+  def __init__(self, root: str | Path, bake_keys: Optional[Sequence[str]] = None):
+    self.root = Path(root)
+    self.manifest = _read_manifest(self.root)
+    keys = list(self.manifest["bakes"]) if bake_keys is None else list(bake_keys)
+    self.shards: List[Tuple[Path, int]] = [
+      (self.root / s["file"], int(s["rows"])) for key in keys for s in self.manifest["bakes"][key]["shards"]
+    ]
+    self._maps: Dict[int, np.ndarray] = {}
+
+  def __len__(self) -> int:
+    return sum(rows for _, rows in self.shards)
+
+  @property
+  def angles(self) -> List[float]:
+    return sorted({bake["angle"] for bake in self.manifest["bakes"].values()})
+
+  def shard(self, index: int) -> np.ndarray:
+    """(rows, ROW_WIDTH) read-only memory map of a shard."""
+    rows = self._maps.get(index)
+    if rows is None:
+      rows = self._maps[index] = np.load(self.shards[index][0], mmap_mode="r")
+    return rows
+
+  @staticmethod
+  def split_rows(rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(N, ROW_WIDTH) rows -> positions (N, 3), angles (N, 1), SH (N, 27)."""
+    return rows[:, POS_COLUMNS], rows[:, ANGLE_COLUMNS], rows[:, SH_COLUMNS]
+
+  def arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Every row in memory as (positions, angles, SH), e.g. for `training.train_fast` on small datasets."""
+    rows = np.concatenate([self.shard(i) for i in range(len(self.shards))]) if self.shards else np.empty((0, ROW_WIDTH), np.float32)
+    return self.split_rows(rows)
+
+  def iter_batches(
+    self,
+    batch_size: int,
+    shuffle: bool = True,
+    window: int = 2,
+    rng: Optional[np.random.Generator] = None,
+  ) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Yield (positions, angles, SH) batches covering every row once.
+
+    With shuffle=True the shard order is shuffled, and rows are shuffled within each
+    window of `window` shards (mixing rows from different bakes).
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    order = rng.permutation(len(self.shards)) if shuffle else np.arange(len(self.shards))
+    for start in range(0, len(order), window):
+      rows = np.concatenate([self.shard(i) for i in order[start : start + window]])
+      if shuffle:
+        rows = rows[rng.permutation(rows.shape[0])]
+      for batch_start in range(0, rows.shape[0], batch_size):
+        yield self.split_rows(rows[batch_start : batch_start + batch_size])
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Convert bake directories tagged with their light angle into a sharded dataset.")
+  parser.add_argument("output")
+  parser.add_argument("--bake", nargs=2, action="append", metavar=("DIR", "ANGLE"), required=True)
+  parser.add_argument("--shard-rows", type=int, default=DEFAULT_SHARD_ROWS)
+  parser.add_argument("--workers", type=int, default=None)
+  args = parser.parse_args()
+
+  manifest = ingest_bakes([(d, float(a)) for d, a in args.bake], args.output, shard_rows=args.shard_rows, workers=args.workers)
+  dataset = ShardedSHDataset(args.output)
+  print(f"{args.output}: {len(manifest['bakes'])} bakes, {len(dataset.shards)} shards, {len(dataset)} rows")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,180 @@
+"""Vectorized decoder for BC6H (unsigned, BC6H_UF16) compressed blocks.
+
+Every 128-bit block encodes a 4x4 tile of half-float RGB texels. Blocks are grouped by
+mode and each mode is decoded for all of its blocks at once with whole-array operations.
+"""
+import re
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+# Bit layouts of the 14 valid modes, in increasing bit position, as written in the D3D11
+# BC6H specification. A range x[a:b] stores bit b first, so x[9:0] is stored LSB first and
+# the reversed ranges x[10:15] of modes 0x0b/0x0f are stored MSB first.
+#   w/x: endpoints of region 0, y/z: endpoints of region 1, d: partition index.
+_MODE_LAYOUTS: Dict[int, str] = {
+  0x00: "m[1:0], gy[4], by[4], bz[4], rw[9:0], gw[9:0], bw[9:0], rx[4:0], gz[4], gy[3:0], gx[4:0], bz[0], gz[3:0], "
+        "bx[4:0], bz[1], by[3:0], ry[4:0], bz[2], rz[4:0], bz[3], d[4:0]",
+  0x01: "m[1:0], gy[5], gz[4], gz[5], rw[6:0], bz[0], bz[1], by[4], gw[6:0], by[5], bz[2], gy[4], bw[6:0], bz[3], "
+        "bz[5], bz[4], rx[5:0], gy[3:0], gx[5:0], gz[3:0], bx[5:0], by[3:0], ry[5:0], rz[5:0], d[4:0]",
+  0x02: "m[4:0], rw[9:0], gw[9:0], bw[9:0], rx[4:0], rw[10], gy[3:0], gx[3:0], gw[10], bz[0], gz[3:0], bx[3:0], "
+        "bw[10], bz[1], by[3:0], ry[4:0], bz[2], rz[4:0], bz[3], d[4:0]",
+  0x06: "m[4:0], rw[9:0], gw[9:0], bw[9:0], rx[3:0], rw[10], gz[4], gy[3:0], gx[4:0], gw[10], gz[3:0], bx[3:0], "
+        "bw[10], bz[1], by[3:0], ry[3:0], bz[0], bz[2], rz[3:0], gy[4], bz[3], d[4:0]",
+  0x0a: "m[4:0], rw[9:0], gw[9:0], bw[9:0], rx[3:0], rw[10], by[4], gy[3:0], gx[3:0], gw[10], bz[0], gz[3:0], "
+        "bx[4:0], bw[10], by[3:0], ry[3:0], bz[1], bz[2], rz[3:0], bz[4], bz[3], d[4:0]",
+  0x0e: "m[4:0], rw[8:0], by[4], gw[8:0], gy[4], bw[8:0], bz[4], rx[4:0], gz[4], gy[3:0], gx[4:0], bz[0], gz[3:0], "
+        "bx[4:0], bz[1], by[3:0], ry[4:0], bz[2], rz[4:0], bz[3], d[4:0]",
+  0x12: "m[4:0], rw[7:0], gz[4], by[4], gw[7:0], bz[2], gy[4], bw[7:0], bz[3], bz[4], rx[5:0], gy[3:0], gx[4:0], "
+        "bz[0], gz[3:0], bx[4:0], bz[1], by[3:0], ry[5:0], rz[5:0], d[4:0]",
+  0x16: "m[4:0], rw[7:0], bz[0], by[4], gw[7:0], gy[5], gy[4], bw[7:0], gz[5], bz[4], rx[4:0], gz[4], gy[3:0], "
+        "gx[5:0], gz[3:0], bx[4:0], bz[1], by[3:0], ry[4:0], bz[2], rz[4:0], bz[3], d[4:0]",
+  0x1a: "m[4:0], rw[7:0], bz[1], by[4], gw[7:0], by[5], gy[4], bw[7:0], bz[5], bz[4], rx[4:0], gz[4], gy[3:0], "
+        "gx[4:0], bz[0], gz[3:0], bx[5:0], by[3:0], ry[4:0], bz[2], rz[4:0], bz[3], d[4:0]",
+  0x1e: "m[4:0], rw[5:0], gz[4], bz[0], bz[1], by[4], gw[5:0], gy[5], by[5], bz[2], gy[4], bw[5:0], gz[5], bz[3], "
+        "bz[5], bz[4], rx[5:0], gy[3:0], gx[5:0], gz[3:0], bx[5:0], by[3:0], ry[5:0], rz[5:0], d[4:0]",
+  0x03: "m[4:0], rw[9:0], gw[9:0], bw[9:0], rx[9:0], gx[9:0], bx[9:0]",
+  0x07: "m[4:0], rw[9:0], gw[9:0], bw[9:0], rx[8:0], rw[10], gx[8:0], gw[10], bx[8:0], bw[10]",
+  0x0b: "m[4:0], rw[9:0], gw[9:0], bw[9:0], rx[7:0], rw[10:11], gx[7:0], gw[10:11], bx[7:0], bw[10:11]",
+  0x0f: "m[4:0], rw[9:0], gw[9:0], bw[9:0], rx[3:0], rw[10:15], gx[3:0], gw[10:15], bx[3:0], bw[10:15]",
+}
+
+# Modes whose endpoints are stored directly rather than as deltas from rw/gw/bw
+_UNTRANSFORMED_MODES = (0x03, 0x1e)
+
+# First 32 two-subset partitions shared with BC7, as 16-bit masks (bit i set: texel i is in subset 1)
+_PARTITION_MASKS = np.array([
+  0xCCCC, 0x8888, 0xEEEE, 0xECC8, 0xC880, 0xFEEC, 0xFEC8, 0xEC80,
+  0xC800, 0xFFEC, 0xFE80, 0xE800, 0xFFE8, 0xFF00, 0xFFF0, 0xF000,
+  0xF710, 0x008E, 0x7100, 0x08CE, 0x008C, 0x7310, 0x3100, 0x8CCE,
+  0x088C, 0x3110, 0x6666, 0x366C, 0x17E8, 0x0FF0, 0x718E, 0x399C,
+], dtype=np.uint32)
+_PARTITIONS = ((_PARTITION_MASKS[:, None] >> np.arange(16, dtype=np.uint32)) & 1).astype(np.intp) # (32, 16)
+
+# Texel index of the anchor (implicit MSB = 0) of subset 1 for each partition
+_ANCHORS = np.array([
+  15, 15, 15, 15, 15, 15, 15, 15,
+  15, 15, 15, 15, 15, 15, 15, 15,
+  15,  2,  8,  2,  2,  8,  8, 15,
+   2,  8,  2,  2,  8,  8,  2,  2,
+], dtype=np.intp)
+
+_WEIGHTS3 = np.array([0, 9, 18, 27, 37, 46, 55, 64], dtype=np.int32)
+_WEIGHTS4 = np.array([0, 4, 9, 13, 17, 21, 26, 30, 34, 38, 43, 47, 51, 55, 60, 64], dtype=np.int32)
+
+_FIELD_RE = re.compile(r"(\w+)\[(\d+)(?::(\d+))?\]")
+
+
+def _parse_layout(layout: str) -> List[Tuple[str, int]]:
+  """Expand a layout string into one (field, bit) pair per block bit."""
+  bits = []
+  for name, a, b in _FIELD_RE.findall(layout):
+    a = int(a)
+    b = a if b == "" else int(b)
+    step = 1 if a >= b else -1
+    bits.extend((name, bit) for bit in range(b, a + step, step))
+  return bits
+
+
+_MODES = {code: _parse_layout(layout) for code, layout in _MODE_LAYOUTS.items()}
+
+
+def _field(block_bits: np.ndarray, layout: List[Tuple[str, int]], name: str) -> np.ndarray:
+  value = np.zeros(block_bits.shape[0], dtype=np.int32)
+  for pos, (field, bit) in enumerate(layout):
+    if field == name:
+      value |= block_bits[:, pos].astype(np.int32) << bit
+  return value
+
+
+def _field_width(layout: List[Tuple[str, int]], name: str) -> int:
+  return max(bit for field, bit in layout if field == name) + 1
+
+
+def _sign_extend(x: np.ndarray, bits: int) -> np.ndarray:
+  sign = 1 << (bits - 1)
+  return (x ^ sign) - sign
+
+
+def _unquantize(comp: np.ndarray, precision: int) -> np.ndarray:
+  if precision >= 15:
+    return comp
+  max_comp = (1 << precision) - 1
+  return np.where(
+    comp == 0,
+    0,
+    np.where(comp == max_comp, 0xFFFF, ((comp << 15) + 0x4000) >> (precision - 1)),
+  )
+
+
+def _decode_mode(block_bits: np.ndarray, code: int) -> np.ndarray:
+  layout = _MODES[code]
+  n = block_bits.shape[0]
+  two_regions = any(field == "d" for field, _ in layout)
+  endpoint_names = ("w", "x", "y", "z") if two_regions else ("w", "x")
+
+  # endpoints: (n, E, 3) with E = 2 per region
+  endpoints = np.zeros((n, len(endpoint_names), 3), dtype=np.int32)
+  for c, channel in enumerate("rgb"):
+    precision = _field_width(layout, channel + "w")
+    base = _field(block_bits, layout, channel + "w")
+    endpoints[:, 0, c] = base
+    for e, name in enumerate(endpoint_names[1:], start=1):
+      value = _field(block_bits, layout, channel + name)
+      if code not in _UNTRANSFORMED_MODES:
+        value = (base + _sign_extend(value, _field_width(layout, channel + name))) & ((1 << precision) - 1)
+      endpoints[:, e, c] = value
+    endpoints[:, :, c] = _unquantize(endpoints[:, :, c], precision)
+
+  # Texel indices follow the header; anchors drop their implicit MSB
+  header = len(layout)
+  index_bits = 3 if two_regions else 4
+  if two_regions:
+    partition = _field(block_bits, layout, "d")
+    anchors = _ANCHORS[partition]
+  else:
+    partition = np.zeros(n, dtype=np.int32)
+    anchors = np.zeros(n, dtype=np.intp)
+
+  indices = np.zeros((n, 16), dtype=np.intp)
+  rows = np.arange(n)
+  pos = np.full(n, header, dtype=np.intp)
+  for texel in range(16):
+    width = np.where((texel == 0) | (anchors == texel), index_bits - 1, index_bits)
+    for bit in range(index_bits):
+      has_bit = bit < width
+      indices[:, texel] |= np.where(has_bit, block_bits[rows, np.minimum(pos + bit, 127)], 0) << bit
+    pos += width
+
+  weights = (_WEIGHTS3 if two_regions else _WEIGHTS4)[indices] # (n, 16)
+  subset = _PARTITIONS[partition] if two_regions else np.zeros((n, 16), dtype=np.intp)
+  a = np.take_along_axis(endpoints, (2 * subset)[:, :, None], axis=1)     # (n, 16, 3)
+  b = np.take_along_axis(endpoints, (2 * subset + 1)[:, :, None], axis=1) # (n, 16, 3)
+  w = weights[:, :, None]
+  value = ((64 - w) * a + w * b + 32) >> 6
+  return ((value * 31) >> 6).astype(np.uint16)
+
+
+def decode_bc6h_blocks(blocks: np.ndarray) -> np.ndarray:
+  """Decode BC6H_UF16 blocks to half floats.
+
+  blocks: uint8 array of shape (..., 16)
+  returns float16 array of shape (..., 4, 4, 3), indexed [texel y, texel x, channel]
+  """
+  blocks = np.asarray(blocks, dtype=np.uint8)
+  lead = blocks.shape[:-1]
+  flat = blocks.reshape(-1, 16)
+  half_bits = np.zeros((flat.shape[0], 16, 3), dtype=np.uint16)
+
+  mode = flat[:, 0] & 0x03
+  mode = np.where(mode < 2, mode, flat[:, 0] & 0x1F)
+  for code in np.unique(mode):
+    # Reserved mode codes stay zero, as the specification requires
+    if int(code) not in _MODES:
+      continue
+    sel = mode == code
+    block_bits = np.unpackbits(flat[sel], axis=1, bitorder="little")
+    half_bits[sel] = _decode_mode(block_bits, int(code))
+
+  return half_bits.view(np.float16).reshape(lead + (4, 4, 3))
@@ -0,0 +1,244 @@
+"""CPU benchmarks for the loading, decoding, sampling and inference hot paths.
+
+Inputs are synthetic .bin/.json textures of configurable dimensions written to a temporary
+directory, so the suite does not depend on the git-lfs `LightmapsData` files. Results are
+written as JSON; `--compare` reports every benchmark that got slower than a stored baseline
+by more than `--threshold` and exits with status 1 if there is any.
+
+  python benchmark.py --output bench.json
+  python benchmark.py --compare bench.json --threshold 0.15
+"""
+import argparse
+import json
+import platform
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from sh_volume import SH_TEXTURE_LAYOUT, SHVolume
+from texture_sampler import (
+  _decode_r11g11b10_uint_to_float_rgb,
+  _encode_float_rgb_to_r11g11b10_uint,
+  load_texture,
+  load_texture_by_name,
+  pixel_decoder,
+  pixel_format_info,
+  sample_uv,
+  sample_uvw_batch,
+)
+
+
+DEFAULT_FORMATS = ("R8G8B8A8", "FloatR11G11B10", "FloatRGBA", "A32B32G32R32F", "A2B10G10R10", "BC6H")
+DEFAULT_SIZES = ((5, 5, 50), (32, 64, 64), (64, 128, 128)) # (D, H, W)
+QUICK_SIZES = ((5, 5, 50), (16, 32, 32))
+DEFAULT_BATCH_SIZES = (1, 128, 4096, 65536)
+QUICK_BATCH_SIZES = (1, 128, 4096)
+
+
+def write_synthetic_texture(
+  tex_dir: str | Path,
+  name: str,
+  pixel_format: str,
+  shape: Tuple[int, int, int],
+  rng: np.random.Generator,
+) -> Path:
+  """Write `name`.bin/.json with random texels of `pixel_format` and (D, H, W) `shape`, returns the .bin path."""
+  info = pixel_format_info(pixel_format)
+  decoder = pixel_decoder(pixel_format)
+  depth, height, width = shape
+  blocks = (depth, -(-height // info.BlockSizeY), -(-width // info.BlockSizeX))
+  count = int(np.prod(blocks)) * decoder.raw_count
+
+  raw_dtype = np.dtype(decoder.raw_dtype)
+  if info.Name in ("FloatR11G11B10", "FloatRGB"):
+    raw = _encode_float_rgb_to_r11g11b10_uint(rng.random((count, 3), dtype=np.float32))
+  elif raw_dtype.kind == "f":
+    raw = rng.random(count, dtype=np.float32).astype(raw_dtype)
+  else:
+    raw = rng.integers(0, np.iinfo(raw_dtype).max, count, dtype=raw_dtype, endpoint=True)
+
+  bin_path = Path(tex_dir) / (name + ".bin")
+  raw.astype(raw_dtype.newbyteorder("<")).tofile(bin_path)
+  meta = {
+    "Width": width,
+    "Height": height,
+    "Depth": depth,
+    "PixelFormat": info.Name,
+    "BytesPerPixel": info.BlockBytes,
+    "TotalBytes": raw.nbytes,
+  }
+  bin_path.with_suffix(".json").write_text(json.dumps(meta), encoding="utf-8")
+  return bin_path
+
+
+def write_synthetic_bake(tex_dir: str | Path, shape: Tuple[int, int, int], rng: np.random.Generator) -> Path:
+  """Write the seven SH textures of a bake in the engine's formats (R8G8B8A8, AmbientVector as FloatR11G11B10)."""
+  Path(tex_dir).mkdir(parents=True, exist_ok=True)
+  for file_name, _ in SH_TEXTURE_LAYOUT.values():
+    pixel_format = "FloatR11G11B10" if file_name == "AmbientVector" else "R8G8B8A8"
+    write_synthetic_texture(tex_dir, file_name, pixel_format, shape, rng)
+  return Path(tex_dir)
+
+
+def measure(fn: Callable[[], object], repeats: int = 5, min_time: float = 0.05) -> Dict[str, float]:
+  """Best and median seconds per call of `fn` over `repeats` rounds of at least `min_time` each."""
+  fn() # warm-up
+  number = 1
+  while True:
+    start = time.perf_counter()
+    for _ in range(number):
+      fn()
+    elapsed = time.perf_counter() - start
+    if elapsed >= min_time:
+      break
+    number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+  times = [elapsed / number]
+  for _ in range(repeats - 1):
+    start = time.perf_counter()
+    for _ in range(number):
+      fn()
+    times.append((time.perf_counter() - start) / number)
+  return {"best": min(times), "median": statistics.median(times), "number": number, "repeats": repeats}
+
+
+class Suite:
+  def __init__(self, repeats: int, min_time: float, pattern: Optional[str] = None):
+    self.repeats = repeats
+    self.min_time = min_time
+    self.pattern = pattern
+    self.results: Dict[str, Dict] = {}
+
+  def run(self, name: str, fn: Callable[[], object], items: int) -> None:
+    """Time `fn`; `items` (pixels, samples, ...) per call gives the throughput."""
+    if self.pattern is not None and self.pattern not in name:
+      return
+    result = measure(fn, repeats=self.repeats, min_time=self.min_time)
+    result["items"] = items
+    result["items_per_sec"] = items / result["best"]
+    self.results[name] = result
+    print(f"{name:60s} {result['best'] * 1e3:10.3f} ms  {result['items_per_sec'] / 1e6:10.3f} M items/s")
+
+
+def _shape_name(shape: Tuple[int, int, int]) -> str:
+  return "x".join(str(s) for s in shape[::-1]) # WxHxD
+
+
+def bench_load_texture(suite: Suite, tmp: Path, formats: Sequence[str], sizes: Sequence[Tuple[int, int, int]], rng) -> None:
+  for pixel_format in formats:
+    for shape in sizes:
+      bin_path = write_synthetic_texture(tmp, f"{pixel_format}_{_shape_name(shape)}", pixel_format, shape, rng)
+      suite.run(f"load_texture[{pixel_format},{_shape_name(shape)}]", lambda: load_texture(bin_path), int(np.prod(shape)))
+
+
+def bench_decode_r11g11b10(suite: Suite, sizes: Sequence[Tuple[int, int, int]], rng) -> None:
+  for shape in sizes:
+    packed = _encode_float_rgb_to_r11g11b10_uint(rng.random(tuple(shape) + (3,), dtype=np.float32))
+    suite.run(f"decode_r11g11b10[{_shape_name(shape)}]", lambda: _decode_r11g11b10_uint_to_float_rgb(packed), packed.size)
+
+
+def bench_sampling(suite: Suite, tmp: Path, shape: Tuple[int, int, int], rng, scalar_points: int = 1000, batch_points: int = 1 << 16) -> None:
+  bake_dir = write_synthetic_bake(tmp / "bake", shape, rng)
+  tex = load_texture_by_name(bake_dir, "SHCoefficients_0", cache=False)
+  uvw = rng.random((batch_points, 3))
+  scalar_uvw = uvw[:scalar_points].tolist()
+
+  for method in ("nearest", "trilinear"):
+    suite.run(f"sample_uv[{method}]", lambda: [sample_uv(tex, u, v, w, method=method) for u, v, w in scalar_uvw], scalar_points)
+    suite.run(f"sample_uvw_batch[{method}]", lambda: sample_uvw_batch(tex, uvw, method=method), batch_points)
+
+  # The notebook's helpers, as defined in nn.ipynb
+  def Texture3DSample(tex, uvw: np.ndarray, method: str = "nearest"):
+    return sample_uvw_batch(tex, uvw.reshape(-1, 3), method=method)
+
+  def GetRawSH3(BrickTextureUVs: np.ndarray):
+    return SHVolume.load(bake_dir).sample(BrickTextureUVs.reshape(-1, 3), method="nearest")
+
+  suite.run("notebook.Texture3DSample", lambda: Texture3DSample(tex, uvw), batch_points)
+  suite.run("notebook.GetRawSH3", lambda: GetRawSH3(uvw), batch_points)
+
+
+def bench_neural_sh(suite: Suite, batch_sizes: Sequence[int], rng) -> None:
+  import torch
+  from neural_sh import NeuralSH
+
+  torch.manual_seed(0)
+  model = NeuralSH().eval()
+  for batch_size in batch_sizes:
+    pos = torch.from_numpy(rng.random((batch_size, 3), dtype=np.float32))
+    angle = torch.from_numpy(rng.random((batch_size, 1), dtype=np.float32))
+
+    def forward():
+      with torch.no_grad():
+        model(pos, angle)
+
+    suite.run(f"NeuralSH.forward[{batch_size}]", forward, batch_size)
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+  """Names of benchmarks whose best time is more than `threshold` (relative) slower than the baseline."""
+  regressions = []
+  for name, result in results.items():
+    base = baseline.get(name)
+    if base is None:
+      print(f"{name:60s} (not in baseline)")
+      continue
+    change = result["best"] / base["best"] - 1.0
+    flag = "REGRESSION" if change > threshold else ""
+    print(f"{name:60s} {base['best'] * 1e3:10.3f} -> {result['best'] * 1e3:10.3f} ms  {change:+7.1%} {flag}")
+    if change > threshold:
+      regressions.append(name)
+  return regressions
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Benchmark the loading, decoding, sampling and inference hot paths on CPU.")
+  parser.add_argument("--output", default=None, help="write the results to this .json")
+  parser.add_argument("--compare", default=None, help="baseline .json to compare against")
+  parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown reported as a regression")
+  parser.add_argument("--filter", default=None, help="only run benchmarks whose name contains this string")
+  parser.add_argument("--formats", nargs="+", default=list(DEFAULT_FORMATS))
+  parser.add_argument("--sizes", nargs="+", default=None, help="texture sizes as WxHxD")
+  parser.add_argument("--batch-sizes", nargs="+", type=int, default=None)
+  parser.add_argument("--repeats", type=int, default=5)
+  parser.add_argument("--min-time", type=float, default=0.05, help="minimum seconds per timed round")
+  parser.add_argument("--quick", action="store_true", help="small sizes for a fast smoke run")
+  parser.add_argument("--seed", type=int, default=0)
+  args = parser.parse_args()
+
+  if args.sizes is not None:
+    sizes = [tuple(int(s) for s in size.split("x"))[::-1] for size in args.sizes]
+  else:
+    sizes = QUICK_SIZES if args.quick else DEFAULT_SIZES
+  batch_sizes = args.batch_sizes or (QUICK_BATCH_SIZES if args.quick else DEFAULT_BATCH_SIZES)
+
+  rng = np.random.default_rng(args.seed)
+  suite = Suite(repeats=args.repeats, min_time=args.min_time, pattern=args.filter)
+  with tempfile.TemporaryDirectory() as tmp:
+    tmp = Path(tmp)
+    bench_load_texture(suite, tmp, args.formats, sizes, rng)
+    bench_decode_r11g11b10(suite, sizes, rng)
+    bench_sampling(suite, tmp, sizes[0], rng)
+    bench_neural_sh(suite, batch_sizes, rng)
+
+  report = {
+    "machine": {"platform": platform.platform(), "processor": platform.processor(), "python": platform.python_version(), "numpy": np.__version__},
+    "results": suite.results,
+  }
+  if args.output is not None:
+    Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+  if args.compare is not None:
+    baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))["results"]
+    regressions = compare(suite.results, baseline, args.threshold)
+    if regressions:
+      print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+      raise SystemExit(1)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,36 @@
+"""Shape constants shared by the NeuralSH models and the torch-free engines.
+
+Kept free of torch (and of the texture I/O stack) so that `inference`, `export_weights`
+and `hlsl_codegen` can be imported without PyTorch installed.
+"""
+
+# 9 SH3 coefficients per color channel
+SH_FLOAT_COUNT = 27
+
+# variable constants
+L_POS = 2
+L_ANGLE = 3
+
+MLP_HIDDEN_LAYER_WIDTH = 512
+
+# fixed constants
+PROBES_DIM_X = 50
+PROBES_DIM_Y = 5
+PROBES_DIM_Z = 5
+PROBES_COUNT = PROBES_DIM_X * PROBES_DIM_Y * PROBES_DIM_Z
+
+ENCODED_POS_DIM = 3 * L_POS * 2
+ENCODED_ANGLE_DIM = 1 * L_ANGLE * 2
+
+INPUT_DIM = PROBES_COUNT + ENCODED_POS_DIM + ENCODED_ANGLE_DIM
+
+# multi-resolution feature grid (NeuralSHGrid)
+GRID_LEVELS = 8
+GRID_FEATURES_PER_LEVEL = 2
+GRID_LOG2_TABLE_SIZE = 15
+GRID_BASE_RESOLUTION = 4
+GRID_MAX_RESOLUTION = 128
+GRID_MLP_HIDDEN_LAYER_WIDTH = 64
+
+# spatial hash of a grid vertex: XOR of coordinates times these primes (Instant-NGP)
+GRID_HASH_PRIMES = (1, 2654435761, 805459861)
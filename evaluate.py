@@ -0,0 +1,221 @@
+"""Streaming evaluation of a NeuralSH model on dense, super-sampled UVW grids.
+
+The notebook compares the model with the bake only at the probe centers. Between probes
+the shader interpolates the true texture trilinearly. That is where the network and the
+bake disagree most, so `evaluate_dense` walks a grid at any multiple of the probe
+resolution through a generator pipeline:
+
+  uvw chunks -> (trilinear ground truth, model prediction) -> squared errors -> metrics / error volume
+
+Every stage works on `chunk_size` samples at a time and the per-texel error volume is a
+`.npy` memory map on disk, so memory stays constant regardless of the grid size.
+"""
+import argparse
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+from sh_volume import SH_FLOAT_COUNT, SH_TEXTURE_LAYOUT, SHVolume
+
+
+# The 27 fused channels are 9 SH3 coefficients per color; coefficient 0 is band 0,
+# coefficients 1..3 band 1 and 4..8 band 2.
+_COEFFICIENT = np.arange(SH_FLOAT_COUNT) % 9
+SH_BANDS: Dict[str, np.ndarray] = {
+  "band0": np.flatnonzero(_COEFFICIENT == 0),
+  "band1": np.flatnonzero((_COEFFICIENT >= 1) & (_COEFFICIENT <= 3)),
+  "band2": np.flatnonzero(_COEFFICIENT >= 4),
+}
+SH_FIELDS: Dict[str, np.ndarray] = {name: channels for name, (_, channels) in SH_TEXTURE_LAYOUT.items()}
+
+# Peak signal of the PSNR: the [0, 1] range of the UNORM SH coefficient textures
+PSNR_PEAK = 1.0
+
+# Log-spaced histogram of per-sample squared errors, used for streaming percentiles.
+# Errors below the first edge (including exact zeros) go to the first bin.
+HISTOGRAM_EDGES = np.logspace(-14, 2, 2049)
+
+
+Predictor = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+
+@dataclass
+class RunningErrorStats:
+  """MSE, max and approximate percentiles of one group of SH channels, updated chunk by chunk.
+
+  A sample's error is the mean squared error over the group's channels, like the per-texel
+  MSE maps of the notebook. Percentiles are read from a fixed log-spaced histogram and are
+  accurate to one bin (about 1.8% relative).
+  """
+  channels: np.ndarray
+  count: int = 0
+  sum: float = 0.0
+  max: float = 0.0
+  histogram: np.ndarray = field(default_factory=lambda: np.zeros(len(HISTOGRAM_EDGES), dtype=np.int64))
+
+  def update(self, sample_errors: np.ndarray) -> None:
+    self.count += sample_errors.shape[0]
+    self.sum += float(sample_errors.sum(dtype=np.float64))
+    if sample_errors.size:
+      self.max = max(self.max, float(sample_errors.max()))
+    bins = np.searchsorted(HISTOGRAM_EDGES, sample_errors, side="right")
+    self.histogram += np.bincount(np.clip(bins - 1, 0, len(HISTOGRAM_EDGES) - 1), minlength=len(HISTOGRAM_EDGES))
+
+  @property
+  def mse(self) -> float:
+    return self.sum / self.count if self.count else float("nan")
+
+  @property
+  def psnr(self) -> float:
+    """PSNR in dB against PSNR_PEAK; inf for an exact match."""
+    mse = self.mse
+    return float(10.0 * np.log10(PSNR_PEAK**2 / mse)) if mse > 0 else float("inf")
+
+  def percentile(self, q: float) -> float:
+    """Upper edge of the histogram bin containing the q-th percentile (q in [0, 100])."""
+    if not self.count:
+      return float("nan")
+    rank = q / 100.0 * self.count
+    index = int(np.searchsorted(np.cumsum(self.histogram), rank, side="left"))
+    index = min(index, len(HISTOGRAM_EDGES) - 1)
+    upper = HISTOGRAM_EDGES[index + 1] if index + 1 < len(HISTOGRAM_EDGES) else self.max
+    return min(float(upper), self.max)
+
+  def report(self, percentiles: Sequence[float]) -> Dict[str, float]:
+    out = {"mse": self.mse, "psnr": self.psnr, "max": self.max}
+    out.update({f"p{q:g}": self.percentile(q) for q in percentiles})
+    return out
+
+
+def uvw_chunks(grid_shape: Tuple[int, int, int], chunk_size: int) -> Iterator[Tuple[int, np.ndarray]]:
+  """Yield (first flat index, (n, 3) float32 UVWs) for the cell centers of a (D, H, W) grid.
+
+  Samples come in texture order (x fastest, z slowest), like the notebook's `pos_grid`.
+  """
+  depth, height, width = grid_shape
+  total = depth * height * width
+  size = np.array([width, height, depth], dtype=np.float64)
+  for start in range(0, total, chunk_size):
+    index = np.arange(start, min(start + chunk_size, total))
+    cell = np.stack([index % width, (index // width) % height, index // (width * height)], axis=-1)
+    yield start, ((cell + 0.5) / size).astype(np.float32)
+
+
+def probe_centers(grid_shape: Tuple[int, int, int]) -> np.ndarray:
+  """(D*H*W, 3) float32 UVWs of every cell center of a (D, H, W) grid, in texture order."""
+  _, uvw = next(uvw_chunks(grid_shape, int(np.prod(grid_shape))))
+  return uvw
+
+
+def evaluated_chunks(
+  chunks: Iterator[Tuple[int, np.ndarray]],
+  volume: SHVolume,
+  predict: Predictor,
+  angle: float,
+) -> Iterator[Tuple[int, np.ndarray]]:
+  """Yield (first flat index, (n, 27) squared errors) of the model against trilinear ground truth."""
+  for start, uvw in chunks:
+    true_sh = volume.sample(uvw, method="trilinear")
+    pred_sh = np.asarray(predict(uvw, np.full((uvw.shape[0], 1), angle, dtype=np.float32)))
+    yield start, np.square(pred_sh.astype(np.float32) - true_sh.astype(np.float32))
+
+
+def as_predictor(model) -> Predictor:
+  """Wrap a torch NeuralSH module as a NumPy predictor; NumPy engines are returned unchanged."""
+  if not hasattr(model, "parameters"):
+    return model
+  import torch
+
+  device = next(model.parameters()).device
+
+  def predict(pos: np.ndarray, angle: np.ndarray) -> np.ndarray:
+    with torch.no_grad():
+      return model(torch.from_numpy(pos).to(device), torch.from_numpy(angle).to(device)).cpu().numpy()
+
+  model.eval()
+  return predict
+
+
+def evaluate_dense(
+  volume: SHVolume,
+  model,
+  scale: int = 8,
+  grid_shape: Optional[Tuple[int, int, int]] = None,
+  angle: float = 0.0,
+  chunk_size: int = 1 << 16,
+  error_volume_path: Optional[str | Path] = None,
+  percentiles: Sequence[float] = (50, 90, 99, 99.9),
+) -> Dict:
+  """Compare `model` with the trilinearly interpolated `volume` on a dense UVW grid.
+
+  - model: a NeuralSH module or any callable (pos (N, 3), angle (N, 1)) -> (N, 27), e.g.
+    inference.NeuralSHInference.
+  - grid_shape: (D, H, W) of the evaluation grid; defaults to `scale` times the probe resolution.
+  - error_volume_path: optional `.npy` written as a (D, H, W, 7) float32 memory map with the
+    per-texel MSE of every texture field (in SH_TEXTURE_LAYOUT order), one depth slice per
+    `errors[z]`.
+  - Returns a report with MSE / PSNR / max / percentiles of the per-sample squared error for
+    every texture field, every SH band and all 27 channels.
+  """
+  if grid_shape is None:
+    grid_shape = (volume.meta.depth * scale, volume.meta.height * scale, volume.meta.width * scale)
+  predict = as_predictor(model)
+
+  groups = {**SH_FIELDS, **SH_BANDS, "all": np.arange(SH_FLOAT_COUNT)}
+  stats = {name: RunningErrorStats(channels) for name, channels in groups.items()}
+
+  errors = None
+  if error_volume_path is not None:
+    errors = np.lib.format.open_memmap(error_volume_path, mode="w+", dtype=np.float32, shape=tuple(grid_shape) + (len(SH_FIELDS),))
+    flat_errors = errors.reshape(-1, len(SH_FIELDS))
+
+  for start, sq_err in evaluated_chunks(uvw_chunks(grid_shape, chunk_size), volume, predict, angle):
+    for name, group in stats.items():
+      sample_errors = sq_err[:, group.channels].mean(axis=1)
+      group.update(sample_errors)
+      if errors is not None and name in SH_FIELDS:
+        flat_errors[start : start + sq_err.shape[0], list(SH_FIELDS).index(name)] = sample_errors
+
+  if errors is not None:
+    errors.flush()
+    del flat_errors, errors
+
+  return {
+    "grid_shape": list(grid_shape),
+    "samples": stats["all"].count,
+    "angle": angle,
+    "fields": {name: stats[name].report(percentiles) for name in SH_FIELDS},
+    "bands": {name: stats[name].report(percentiles) for name in SH_BANDS},
+    "all": stats["all"].report(percentiles),
+  }
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Dense, super-sampled error statistics of a NeuralSH checkpoint.")
+  parser.add_argument("checkpoint", nargs="?", default="best_model.pth")
+  parser.add_argument("--data", default="LightmapsData")
+  parser.add_argument("--scale", type=int, default=8)
+  parser.add_argument("--angle", type=float, default=0.0)
+  parser.add_argument("--chunk-size", type=int, default=1 << 16)
+  parser.add_argument("--errors", default=None, help="write the per-field error volume to this .npy")
+  parser.add_argument("--report", default=None, help="write the report to this .json")
+  args = parser.parse_args()
+
+  from inference import NeuralSHInference
+
+  engine = NeuralSHInference.from_checkpoint(args.checkpoint, chunk_size=args.chunk_size)
+  report = evaluate_dense(
+    SHVolume.load(args.data), engine, scale=args.scale, angle=args.angle,
+    chunk_size=args.chunk_size, error_volume_path=args.errors,
+  )
+  text = json.dumps(report, indent=2)
+  if args.report is not None:
+    Path(args.report).write_text(text, encoding="utf-8")
+  print(text)
+
+
+if __name__ == "__main__":
+  main()
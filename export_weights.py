@@ -0,0 +1,178 @@
+"""Binary export of NeuralSH weights for the engine.
+
+Layout of a weights blob (little-endian):
+
+  header        HEADER_DTYPE, at offset 0
+  layer table   num_layers x LAYER_DTYPE, right after the header
+  tensors       row-major weights (out, in) and biases (out,), each starting on an
+                ALIGNMENT-byte boundary at the offsets recorded in the layer table
+
+With `folded` set the probe features are folded into the first-layer bias (see
+inference.fold_probe_features) and the first layer only has the encoded-input columns.
+Otherwise `probe_features_offset` points at the PROBES_COUNT probe features.
+Every tensor can be uploaded as-is into a StructuredBuffer or viewed with NumPy.
+"""
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from constants import L_ANGLE, L_POS, PROBES_DIM_X, PROBES_DIM_Y, PROBES_DIM_Z
+from inference import fold_probe_features, layer_names, to_numpy
+
+
+MAGIC = b"NSHW"
+VERSION = 1
+ALIGNMENT = 256
+
+DTYPES = {"fp32": (0, np.dtype("<f4")), "fp16": (1, np.dtype("<f2"))}
+
+FLAG_FOLDED = 1 << 0
+
+HEADER_DTYPE = np.dtype([
+  ("magic", "S4"),
+  ("version", "<u4"),
+  ("dtype", "<u4"),
+  ("flags", "<u4"),
+  ("l_pos", "<u4"),
+  ("l_angle", "<u4"),
+  ("probe_dims", "<u4", (3,)),
+  ("num_layers", "<u4"),
+  ("probe_features_offset", "<u8"),
+  ("total_bytes", "<u8"),
+])
+
+LAYER_DTYPE = np.dtype([
+  ("out_features", "<u4"),
+  ("in_features", "<u4"),
+  ("weight_offset", "<u8"),
+  ("bias_offset", "<u8"),
+])
+
+
+def _align(offset: int) -> int:
+  return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+@dataclass
+class WeightsBlob:
+  header: np.ndarray # HEADER_DTYPE record
+  table: np.ndarray # num_layers LAYER_DTYPE records
+  layers: List[Tuple[np.ndarray, np.ndarray]] # (weight (out, in), bias (out,)) views into the blob
+  probe_features: Optional[np.ndarray] # None when folded
+
+  @property
+  def folded(self) -> bool:
+    return bool(self.header["flags"] & FLAG_FOLDED)
+
+  @property
+  def dtype(self) -> np.dtype:
+    return self.layers[0][0].dtype
+
+
+def export_weights(
+  state_dict: Dict,
+  path: str | Path,
+  dtype: str = "fp32",
+  fold: bool = True,
+  probe_dims: Tuple[int, int, int] = (PROBES_DIM_X, PROBES_DIM_Y, PROBES_DIM_Z),
+) -> int:
+  """Write a NeuralSH state dict as a weights blob, returns the number of bytes written."""
+  dtype_id, np_dtype = DTYPES[dtype]
+
+  if fold:
+    layers = fold_probe_features(state_dict)
+    probe_features = None
+  else:
+    layers = [(to_numpy(state_dict[f"{n}.weight"]), to_numpy(state_dict[f"{n}.bias"])) for n in layer_names(state_dict)]
+    probe_features = to_numpy(state_dict["probe_features"])
+
+  header = np.zeros((), dtype=HEADER_DTYPE)
+  table = np.zeros(len(layers), dtype=LAYER_DTYPE)
+  tensors = []
+  offset = _align(HEADER_DTYPE.itemsize + table.nbytes)
+  for i, (weight, bias) in enumerate(layers):
+    table[i]["out_features"], table[i]["in_features"] = weight.shape
+    for field, tensor in (("weight_offset", weight), ("bias_offset", bias)):
+      table[i][field] = offset
+      tensors.append((offset, np.ascontiguousarray(tensor, dtype=np_dtype)))
+      offset = _align(offset + tensors[-1][1].nbytes)
+  if probe_features is not None:
+    header["probe_features_offset"] = offset
+    tensors.append((offset, np.ascontiguousarray(probe_features, dtype=np_dtype)))
+    offset = _align(offset + tensors[-1][1].nbytes)
+
+  header["magic"] = MAGIC
+  header["version"] = VERSION
+  header["dtype"] = dtype_id
+  header["flags"] = FLAG_FOLDED if fold else 0
+  header["l_pos"] = L_POS
+  header["l_angle"] = L_ANGLE
+  header["probe_dims"] = probe_dims
+  header["num_layers"] = len(layers)
+  header["total_bytes"] = offset
+
+  blob = np.zeros(offset, dtype=np.uint8)
+  blob[: HEADER_DTYPE.itemsize] = np.frombuffer(header.tobytes(), dtype=np.uint8)
+  blob[HEADER_DTYPE.itemsize : HEADER_DTYPE.itemsize + table.nbytes] = np.frombuffer(table.tobytes(), dtype=np.uint8)
+  for start, tensor in tensors:
+    blob[start : start + tensor.nbytes] = np.frombuffer(tensor.tobytes(), dtype=np.uint8)
+  blob.tofile(path)
+  return offset
+
+
+def load_weights(path: str | Path, mmap: bool = True) -> WeightsBlob:
+  """Open a weights blob; with mmap=True every tensor is a read-only view of the file."""
+  raw = np.memmap(path, dtype=np.uint8, mode="r") if mmap else np.fromfile(path, dtype=np.uint8)
+  header = raw[: HEADER_DTYPE.itemsize].view(HEADER_DTYPE)[0]
+  if header["magic"] != MAGIC:
+    raise ValueError(f"{path} is not a NeuralSH weights blob")
+  if header["version"] != VERSION:
+    raise ValueError(f"Unsupported weights blob version {header['version']}")
+  if raw.nbytes < header["total_bytes"]:
+    raise ValueError(f"Weights blob size {raw.nbytes} < header total_bytes {header['total_bytes']}")
+
+  np_dtype = next((d for dtype_id, d in DTYPES.values() if dtype_id == header["dtype"]), None)
+  if np_dtype is None:
+    raise ValueError(f"Unsupported weights dtype {header['dtype']}")
+  table_end = HEADER_DTYPE.itemsize + int(header["num_layers"]) * LAYER_DTYPE.itemsize
+  table = raw[HEADER_DTYPE.itemsize : table_end].view(LAYER_DTYPE)
+
+  def tensor(offset, shape):
+    count = int(np.prod(shape))
+    return raw[offset : offset + count * np_dtype.itemsize].view(np_dtype).reshape(shape)
+
+  layers = []
+  for entry in table:
+    out_features, in_features = int(entry["out_features"]), int(entry["in_features"])
+    layers.append((
+      tensor(int(entry["weight_offset"]), (out_features, in_features)),
+      tensor(int(entry["bias_offset"]), (out_features,)),
+    ))
+
+  probe_features = None
+  if not header["flags"] & FLAG_FOLDED:
+    probe_features = tensor(int(header["probe_features_offset"]), (int(np.prod(header["probe_dims"])),))
+  return WeightsBlob(header=header, table=table, layers=layers, probe_features=probe_features)
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Export a NeuralSH checkpoint as a binary weights blob.")
+  parser.add_argument("checkpoint", nargs="?", default="best_model.pth")
+  parser.add_argument("output", nargs="?", default="neural_sh_weights.bin")
+  parser.add_argument("--dtype", choices=sorted(DTYPES), default="fp32")
+  parser.add_argument("--no-fold", action="store_true", help="keep the probe features as a separate tensor")
+  args = parser.parse_args()
+
+  import torch
+  state_dict = torch.load(args.checkpoint, map_location="cpu")
+  size = export_weights(state_dict, args.output, dtype=args.dtype, fold=not args.no_fold)
+  blob = load_weights(args.output)
+  shapes = ", ".join(f"{w.shape[0]}x{w.shape[1]}" for w, _ in blob.layers)
+  print(f"wrote {args.output}: {size} bytes, {args.dtype}, layers [{shapes}], folded={blob.folded}")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,222 @@
+"""Generate a NeuralSH compute shader specialized to an exported checkpoint.
+
+The generated kernel reads the folded weights blob written by export_weights.py as one
+ByteAddressBuffer, with every tensor offset, layer shape and encoding frequency baked in
+as a constant. Probe features are already folded into the first-layer bias, so no sample
+touches them. Each thread group evaluates TILE_SAMPLES samples together: activations
+live in groupshared memory and every weight that is fetched is reused for the whole tile.
+A dispatch therefore needs ceil(N / TILE_SAMPLES) groups (`dispatch_group_count`), not
+ceil(N / THREADS).
+
+`emulate` runs the same arithmetic in NumPy (float32, same accumulation order, same
+constants), so parity with NeuralSH can be checked without a GPU.
+"""
+import argparse
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from export_weights import ALIGNMENT, WeightsBlob, export_weights, load_weights
+from inference import encoding_frequencies
+
+
+THREADS = 64
+TILE_SAMPLES = 4
+
+
+def _float_literal(value: float) -> str:
+  # 9 significant digits round-trip any float32
+  return f"{float(np.float32(value)):.9g}f"
+
+
+def _element_offset(byte_offset: int, itemsize: int) -> int:
+  assert byte_offset % ALIGNMENT == 0
+  return byte_offset // itemsize
+
+
+def _encoding_lines(l_pos: int, l_angle: int) -> List[str]:
+  # Order matches NeuralSH: for each frequency sin(x, y, z) then cos(x, y, z); then the angle
+  lines = []
+  k = 0
+  for freq in encoding_frequencies(l_pos):
+    for fn in ("sin", "cos"):
+      for axis in "xyz":
+        lines.append(f"    Activations[0][o + {k}] = {fn}({_float_literal(freq)} * pos.{axis});")
+        k += 1
+  for freq in encoding_frequencies(l_angle):
+    for fn in ("sin", "cos"):
+      lines.append(f"    Activations[0][o + {k}] = {fn}({_float_literal(freq)} * angle);")
+      k += 1
+  return lines
+
+
+def dispatch_group_count(num_samples: int) -> int:
+  """Thread groups to dispatch for `num_samples` samples: one group per TILE_SAMPLES samples."""
+  return -(-num_samples // TILE_SAMPLES)
+
+
+def generate_shader(blob: WeightsBlob, source_name: str = "best_model.pth") -> str:
+  """HLSL source of a compute shader evaluating `blob` (must be folded).
+
+  Each group of THREADS threads evaluates TILE_SAMPLES samples, so the kernel must be
+  dispatched with ceil(NumSamples / TILE_SAMPLES) groups (see `dispatch_group_count`);
+  the generated header comment says so too.
+  """
+  if not blob.folded:
+    raise ValueError("The shader generator needs a folded weights blob (export_weights(..., fold=True))")
+  header = blob.header
+  itemsize = blob.dtype.itemsize
+  l_pos, l_angle = int(header["l_pos"]), int(header["l_angle"])
+  encoded_dim = 3 * l_pos * 2 + l_angle * 2
+  assert blob.layers[0][0].shape[1] == encoded_dim
+
+  widths = [w.shape[0] for w, _ in blob.layers]
+  act_stride = max([encoded_dim] + widths[:-1])
+  output_dim = widths[-1]
+
+  if itemsize == 4:
+    load_weight = "    return asfloat(Weights.Load(index * 4));"
+  else:
+    load_weight = "    uint packed = Weights.Load((index * 2) & ~3u);\n    return f16tof32(packed >> ((index & 1u) * 16));"
+
+  out = []
+  emit = out.append
+  emit(f"// NeuralSHCompute.usf - generated by hlsl_codegen.py from {source_name}. Do not edit by hand.")
+  emit(f"// {len(blob.layers) - 1} hidden layers of width {widths[0]}, {'fp32' if itemsize == 4 else 'fp16'} weights,")
+  emit(f"// L_POS = {l_pos}, L_ANGLE = {l_angle}, probe grid {tuple(int(d) for d in header['probe_dims'])} folded into the first-layer bias.")
+  emit(f"// Dispatch: each group of THREADS = {THREADS} threads evaluates TILE_SAMPLES = {TILE_SAMPLES} samples,")
+  emit(f"// so dispatch (NumSamples + {TILE_SAMPLES - 1}) / {TILE_SAMPLES} groups, not (NumSamples + {THREADS - 1}) / {THREADS}.")
+  emit("")
+  emit(f"static const uint ENCODED_DIM = {encoded_dim};")
+  emit(f"static const uint ACT_STRIDE = {act_stride};")
+  emit(f"static const uint SH_FLOAT_COUNT = {output_dim};")
+  emit(f"static const uint THREADS = {THREADS};")
+  emit(f"static const uint TILE_SAMPLES = {TILE_SAMPLES};")
+  emit("")
+  emit("StructuredBuffer<float3> Positions : register(t0); // N")
+  emit("StructuredBuffer<float>  Angles    : register(t1); // N")
+  emit("ByteAddressBuffer        Weights   : register(t2); // weights blob from export_weights.py, uploaded as-is")
+  emit("RWStructuredBuffer<float> Output   : register(u0); // N * SH_FLOAT_COUNT")
+  emit("")
+  emit("cbuffer ShaderParams : register(b0)")
+  emit("{")
+  emit("    uint NumSamples;")
+  emit("    uint _pad0;")
+  emit("    uint _pad1;")
+  emit("    uint _pad2;")
+  emit("}")
+  emit("")
+  emit("// Two ping-pong activation tiles, TILE_SAMPLES rows of ACT_STRIDE floats")
+  emit("groupshared float Activations[2][TILE_SAMPLES * ACT_STRIDE];")
+  emit("")
+  emit("float LoadWeight(uint index)")
+  emit("{")
+  emit(load_weight)
+  emit("}")
+  emit("")
+  emit("float sigmoid(float x)")
+  emit("{")
+  emit("    return 1.0 / (1.0 + exp(-x));")
+  emit("}")
+  emit("")
+  emit("[numthreads(THREADS, 1, 1)]")
+  emit("void MainCS(uint3 groupId : SV_GroupID, uint groupIndex : SV_GroupIndex)")
+  emit("{")
+  emit("    uint tileBase = groupId.x * TILE_SAMPLES;")
+  emit("")
+  emit("    // Encoding: one thread per sample of the tile; frequencies are compile-time constants")
+  emit("    if (groupIndex < TILE_SAMPLES)")
+  emit("    {")
+  emit("        uint idx = min(tileBase + groupIndex, NumSamples - 1);")
+  emit("        float3 pos = Positions[idx];")
+  emit("        float angle = Angles[idx];")
+  emit("        uint o = groupIndex * ACT_STRIDE;")
+  out.extend("    " + line for line in _encoding_lines(l_pos, l_angle))
+  emit("    }")
+  emit("    GroupMemoryBarrierWithGroupSync();")
+
+  src = 0
+  for i, (weight, entry) in enumerate(zip((w for w, _ in blob.layers), blob.table)):
+    out_dim, in_dim = weight.shape
+    w_off = _element_offset(int(entry["weight_offset"]), itemsize)
+    b_off = _element_offset(int(entry["bias_offset"]), itemsize)
+    last = i == len(blob.layers) - 1
+    emit("")
+    emit(f"    // Layer {i}: {in_dim} -> {out_dim}{'' if last else ', sigmoid'}")
+    emit(f"    for (uint j = groupIndex; j < {out_dim}u; j += THREADS)")
+    emit("    {")
+    emit("        float acc[TILE_SAMPLES];")
+    emit("        [unroll] for (uint t = 0; t < TILE_SAMPLES; ++t)")
+    emit(f"            acc[t] = LoadWeight({b_off}u + j);")
+    emit(f"        uint row = {w_off}u + j * {in_dim}u;")
+    emit(f"        for (uint k = 0; k < {in_dim}u; ++k)")
+    emit("        {")
+    emit("            float w = LoadWeight(row + k);")
+    emit("            [unroll] for (uint t = 0; t < TILE_SAMPLES; ++t)")
+    emit(f"                acc[t] += w * Activations[{src}][t * ACT_STRIDE + k];")
+    emit("        }")
+    if last:
+      emit("        [unroll] for (uint t = 0; t < TILE_SAMPLES; ++t)")
+      emit("        {")
+      emit("            if (tileBase + t < NumSamples)")
+      emit("                Output[(tileBase + t) * SH_FLOAT_COUNT + j] = acc[t];")
+      emit("        }")
+    else:
+      emit("        [unroll] for (uint t = 0; t < TILE_SAMPLES; ++t)")
+      emit(f"            Activations[{1 - src}][t * ACT_STRIDE + j] = sigmoid(acc[t]);")
+    emit("    }")
+    if not last:
+      emit("    GroupMemoryBarrierWithGroupSync();")
+    src = 1 - src
+  emit("}")
+  return "\n".join(out) + "\n"
+
+
+def emulate(blob: WeightsBlob, pos: np.ndarray, angle: np.ndarray) -> np.ndarray:
+  """Evaluate the generated kernel in NumPy: float32 math, bias-first sequential accumulation
+  over the inputs, the same float32 frequency constants and sigmoid formula.
+
+  pos (N, 3), angle (N, 1) -> (N, SH_FLOAT_COUNT) float32
+  """
+  header = blob.header
+  pos = np.asarray(pos, dtype=np.float32).reshape(-1, 3)
+  angle = np.asarray(angle, dtype=np.float32).reshape(-1)
+
+  columns = []
+  for freq in encoding_frequencies(int(header["l_pos"])):
+    columns += [np.sin(freq * pos[:, axis]) for axis in range(3)]
+    columns += [np.cos(freq * pos[:, axis]) for axis in range(3)]
+  for freq in encoding_frequencies(int(header["l_angle"])):
+    columns += [np.sin(freq * angle), np.cos(freq * angle)]
+  x = np.stack(columns, axis=1).astype(np.float32)
+
+  for i, (weight, bias) in enumerate(blob.layers):
+    weight = np.asarray(weight, dtype=np.float32)
+    acc = np.broadcast_to(np.asarray(bias, dtype=np.float32), (x.shape[0], weight.shape[0])).copy()
+    for k in range(weight.shape[1]):
+      acc += x[:, k : k + 1] * weight[None, :, k]
+    if i != len(blob.layers) - 1:
+      acc = np.float32(1.0) / (np.float32(1.0) + np.exp(-acc))
+    x = acc
+  return x
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Generate NeuralSHCompute.usf specialized to a checkpoint.")
+  parser.add_argument("checkpoint", nargs="?", default="best_model.pth")
+  parser.add_argument("--weights", default="neural_sh_weights.bin", help="weights blob to write and bind as Weights")
+  parser.add_argument("--dtype", choices=("fp32", "fp16"), default="fp32")
+  parser.add_argument("-o", "--output", default="NeuralSHCompute.usf")
+  args = parser.parse_args()
+
+  import torch
+  state_dict = torch.load(args.checkpoint, map_location="cpu")
+  export_weights(state_dict, args.weights, dtype=args.dtype, fold=True)
+  blob = load_weights(args.weights)
+  Path(args.output).write_text(generate_shader(blob, Path(args.checkpoint).name), encoding="utf-8")
+  print(f"wrote {args.output} and {args.weights}; dispatch ceil(N / {TILE_SAMPLES}) thread groups")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,283 @@
+"""Incremental retraining of a NeuralSH checkpoint after a partial re-bake.
+
+A `BakeSignature` records the content hash of every SH texture file of a bake and of every
+region (by default one padded brick, DEFAULT_BRICK_SIZE + 1 texels per axis) of its decoded,
+fused SH volume. It is saved next to the checkpoint. After a re-bake, `diff_bake` compares the
+new bake with the signature. Unchanged files skip decoding altogether. Otherwise the regions
+whose hash differs are marked as changed.
+
+`fine_tune` then warm-starts from the existing checkpoint. Every epoch trains on all probes
+of the changed regions plus a fresh replay sample of unchanged probes, and training stops
+as soon as the MSE on the changed probes and on a fixed replay set of unchanged probes is
+under the target. The turnaround scales with the size of the edit, not with the level.
+"""
+import argparse
+import hashlib
+import json
+import math
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import torch
+from torch import nn
+
+from bake_dataset import sh_file_hashes
+from evaluate import probe_centers
+from sh_volume import SHVolume
+from training import train_epoch
+from volumetric_lightmap import DEFAULT_BRICK_SIZE
+
+
+SIGNATURE_VERSION = 1
+DEFAULT_REGION_SIZE = (DEFAULT_BRICK_SIZE + 1,) * 3 # (z, y, x) texels, one padded brick
+
+
+def _region_grid(shape: Tuple[int, int, int], region_size: Tuple[int, int, int]) -> Tuple[int, int, int]:
+  return tuple(-(-s // r) for s, r in zip(shape, region_size))
+
+
+def region_hashes(data: np.ndarray, region_size: Tuple[int, int, int] = DEFAULT_REGION_SIZE) -> np.ndarray:
+  """64-bit BLAKE2b hash of every region of a (D, H, W, C) volume, as a (RD, RH, RW) array of hex strings.
+
+  Edge regions are zero-padded to the full region size.
+  """
+  grid = _region_grid(data.shape[:3], region_size)
+  padded = np.zeros(tuple(g * r for g, r in zip(grid, region_size)) + data.shape[3:], dtype=data.dtype)
+  padded[: data.shape[0], : data.shape[1], : data.shape[2]] = data
+  (rd, rh, rw), (sz, sy, sx) = grid, region_size
+  # (RD, RH, RW, sz, sy, sx, C): every region contiguous
+  regions = np.ascontiguousarray(padded.reshape(rd, sz, rh, sy, rw, sx, -1).transpose(0, 2, 4, 1, 3, 5, 6))
+  rows = regions.reshape(rd * rh * rw, -1).view(np.uint8)
+  return np.array([hashlib.blake2b(row, digest_size=8).hexdigest() for row in rows]).reshape(grid)
+
+
+@dataclass
+class BakeSignature:
+  shape: Tuple[int, int, int] # (D, H, W) of the SH volume
+  region_size: Tuple[int, int, int]
+  files: Dict[str, str] # file name -> SHA-256
+  regions: np.ndarray # (RD, RH, RW) hex digests
+
+  @classmethod
+  def from_bake(cls, bake_dir: str | Path, region_size: Tuple[int, int, int] = DEFAULT_REGION_SIZE) -> "BakeSignature":
+    volume = SHVolume.load(bake_dir)
+    return cls.from_volume(volume, sh_file_hashes(bake_dir), region_size)
+
+  @classmethod
+  def from_volume(cls, volume: SHVolume, files: Dict[str, str], region_size: Tuple[int, int, int] = DEFAULT_REGION_SIZE) -> "BakeSignature":
+    return cls(
+      shape=tuple(volume.data.shape[:3]),
+      region_size=tuple(region_size),
+      files=files,
+      regions=region_hashes(volume.data, region_size),
+    )
+
+  def save(self, path: str | Path) -> None:
+    data = {
+      "version": SIGNATURE_VERSION,
+      "shape": list(self.shape),
+      "region_size": list(self.region_size),
+      "files": self.files,
+      "regions": self.regions.reshape(-1).tolist(),
+    }
+    Path(path).write_text(json.dumps(data), encoding="utf-8")
+
+  @classmethod
+  def load(cls, path: str | Path) -> "BakeSignature":
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    if data.get("version") != SIGNATURE_VERSION:
+      raise ValueError(f"Unsupported bake signature version {data.get('version')}")
+    shape, region_size = tuple(data["shape"]), tuple(data["region_size"])
+    return cls(shape, region_size, data["files"], np.array(data["regions"]).reshape(_region_grid(shape, region_size)))
+
+
+@dataclass
+class BakeDiff:
+  volume: Optional[SHVolume] # the new bake, None when no file changed
+  signature: BakeSignature # signature of the new bake
+  changed_regions: np.ndarray # (RD, RH, RW) bool
+
+  @property
+  def changed_fraction(self) -> float:
+    return float(self.changed_regions.mean()) if self.changed_regions.size else 0.0
+
+  def changed_texels(self) -> np.ndarray:
+    """(D, H, W) bool mask of the texels inside changed regions."""
+    mask = self.changed_regions
+    for axis, size in enumerate(self.signature.region_size):
+      mask = np.repeat(mask, size, axis=axis)
+    depth, height, width = self.signature.shape
+    return mask[:depth, :height, :width]
+
+
+def diff_bake(new_dir: str | Path, previous: BakeSignature) -> BakeDiff:
+  """Compare a bake directory with the signature of the bake the checkpoint was trained on."""
+  files = sh_file_hashes(new_dir)
+  if files == previous.files:
+    return BakeDiff(None, previous, np.zeros_like(previous.regions, dtype=bool))
+
+  volume = SHVolume.load(new_dir)
+  signature = BakeSignature.from_volume(volume, files, previous.region_size)
+  if signature.shape != previous.shape:
+    # A resized volume moves every probe: retrain everything
+    return BakeDiff(volume, signature, np.ones_like(signature.regions, dtype=bool))
+  return BakeDiff(volume, signature, signature.regions != previous.regions)
+
+
+def _mse(model: nn.Module, pos: torch.Tensor, angle: torch.Tensor, target: torch.Tensor) -> float:
+  if pos.shape[0] == 0:
+    return 0.0
+  with torch.no_grad():
+    return torch.mean((model(pos, angle) - target) ** 2).item()
+
+
+def fine_tune(
+  model: nn.Module,
+  positions: np.ndarray,
+  light_angles: np.ndarray,
+  spherical_harmonics: np.ndarray,
+  changed: np.ndarray,
+  target_mse=1e-4,
+  replay_ratio=0.5,
+  replay_eval_size=4096,
+  max_epochs=1000,
+  lr=1e-4,
+  batch_size=128,
+  device="cpu",
+  log_every=10,
+  checkpoint_path="best_model.pth",
+  seed: Optional[int] = None,
+):
+  """Fine-tune a warm-started model on the changed rows (bool mask `changed`) plus a replay of the rest.
+
+  - Each epoch trains on every changed row and `replay_ratio` times as many unchanged rows,
+    drawn afresh every epoch.
+  - Stops once the MSE on the changed rows and on a fixed sample of `replay_eval_size`
+    unchanged rows are both <= target_mse, or after max_epochs.
+  - Returns (model, history); the model is saved to `checkpoint_path`.
+  """
+  model = model.to(device)
+  criterion = nn.SmoothL1Loss()
+  optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+  rng = np.random.default_rng(seed)
+  if seed is not None:
+    torch.manual_seed(seed)
+
+  pos = torch.as_tensor(np.asarray(positions), dtype=torch.float32, device=device).view(-1, 3)
+  angle = torch.as_tensor(np.asarray(light_angles), dtype=torch.float32, device=device).view(-1, 1)
+  target = torch.as_tensor(np.asarray(spherical_harmonics), dtype=torch.float32, device=device)
+  changed = np.asarray(changed, dtype=bool).reshape(-1)
+  assert pos.shape[0] == angle.shape[0] == target.shape[0] == changed.shape[0]
+
+  changed_idx = np.flatnonzero(changed)
+  unchanged_idx = np.flatnonzero(~changed)
+  replay_count = min(unchanged_idx.size, math.ceil(replay_ratio * changed_idx.size))
+  eval_replay_idx = rng.choice(unchanged_idx, size=min(unchanged_idx.size, replay_eval_size), replace=False)
+  eval_sets = {
+    "changed": torch.as_tensor(changed_idx, device=device),
+    "replay": torch.as_tensor(eval_replay_idx, device=device),
+  }
+
+  def evaluate() -> Dict[str, float]:
+    model.eval()
+    return {name: _mse(model, pos[idx], angle[idx], target[idx]) for name, idx in eval_sets.items()}
+
+  history = {"train_loss": [], "changed_mse": [], "replay_mse": []}
+  errors = evaluate()
+  print(f"changed rows: {changed_idx.size}/{changed.size}, "
+        f"initial MSE changed {errors['changed']:.6g} replay {errors['replay']:.6g}")
+
+  start_time = time.perf_counter()
+  epoch = 0
+  while max(errors.values()) > target_mse and epoch < max_epochs:
+    replay = rng.choice(unchanged_idx, size=replay_count, replace=False)
+    rows = torch.as_tensor(rng.permutation(np.concatenate([changed_idx, replay])), device=device)
+    batches = ((pos[b], angle[b], target[b]) for b in rows.split(batch_size))
+    train_loss, _ = train_epoch(model, criterion, optimizer, batches)
+    epoch += 1
+
+    errors = evaluate()
+    history["train_loss"].append(train_loss.item())
+    history["changed_mse"].append(errors["changed"])
+    history["replay_mse"].append(errors["replay"])
+    if epoch % log_every == 0:
+      print(f"Epoch [{epoch}/{max_epochs}] Train Loss: {history['train_loss'][-1]:.6f} "
+            f"MSE changed {errors['changed']:.6g} replay {errors['replay']:.6g}")
+
+  history["epochs"] = epoch
+  history["converged"] = max(errors.values()) <= target_mse
+  print(f"{'reached' if history['converged'] else 'did not reach'} target MSE {target_mse:g} "
+        f"after {epoch} epochs in {time.perf_counter() - start_time:.2f}s")
+  torch.save(model.state_dict(), checkpoint_path)
+  return model, history
+
+
+def retrain_incremental(
+  model: nn.Module,
+  new_dir: str | Path,
+  previous: BakeSignature,
+  angle: float = 0.0,
+  checkpoint_path="best_model.pth",
+  signature_path: Optional[str | Path] = None,
+  **fine_tune_kwargs,
+):
+  """Diff `new_dir` against `previous`, fine-tune the warm-started `model` on the changes and
+  save the new bake's signature. Returns (model, diff, history); history is None if nothing changed.
+  """
+  diff = diff_bake(new_dir, previous)
+  print(f"{diff.changed_regions.sum()}/{diff.changed_regions.size} regions changed ({diff.changed_fraction:.1%})")
+  history = None
+  if diff.changed_regions.any():
+    positions = probe_centers(diff.signature.shape)
+    angles = np.full((positions.shape[0], 1), angle, dtype=np.float32)
+    sh = diff.volume.data.reshape(positions.shape[0], -1)
+    model, history = fine_tune(model, positions, angles, sh, diff.changed_texels().reshape(-1),
+                               checkpoint_path=checkpoint_path, **fine_tune_kwargs)
+  if signature_path is not None:
+    diff.signature.save(signature_path)
+  return model, diff, history
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Fine-tune a NeuralSH checkpoint on the regions that changed in a re-bake.")
+  parser.add_argument("bake", help="directory of the new bake")
+  parser.add_argument("--checkpoint", default="best_model.pth")
+  parser.add_argument("--signature", default=None, help="signature of the bake the checkpoint was trained on (default: <checkpoint>.bake.json)")
+  parser.add_argument("--previous", default=None, help="previous bake directory, used only when there is no signature yet")
+  parser.add_argument("--output", default=None, help="fine-tuned checkpoint (default: overwrite --checkpoint)")
+  parser.add_argument("--angle", type=float, default=0.0)
+  parser.add_argument("--target-mse", type=float, default=1e-4)
+  parser.add_argument("--replay-ratio", type=float, default=0.5)
+  parser.add_argument("--max-epochs", type=int, default=1000)
+  parser.add_argument("--lr", type=float, default=1e-4)
+  parser.add_argument("--device", default="cpu")
+  args = parser.parse_args()
+
+  from neural_sh import NeuralSH
+
+  signature_path = Path(args.signature or Path(args.checkpoint).with_suffix(".bake.json"))
+  if signature_path.exists():
+    previous = BakeSignature.load(signature_path)
+    if args.previous is not None:
+      print(f"using the signature at {signature_path}; --previous is ignored")
+  elif args.previous is not None:
+    previous = BakeSignature.from_bake(args.previous)
+  else:
+    raise SystemExit(f"No signature at {signature_path}; pass --previous with the bake the checkpoint was trained on")
+
+  model = NeuralSH()
+  model.load_state_dict(torch.load(args.checkpoint, map_location="cpu"))
+  output = args.output or args.checkpoint
+  retrain_incremental(
+    model, args.bake, previous, angle=args.angle, checkpoint_path=output,
+    signature_path=Path(output).with_suffix(".bake.json"),
+    target_mse=args.target_mse, replay_ratio=args.replay_ratio, max_epochs=args.max_epochs,
+    lr=args.lr, device=args.device,
+  )
+
+
+if __name__ == "__main__":
+  main()
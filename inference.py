@@ -0,0 +1,231 @@
+"""Inference-only CPU engine for trained NeuralSH checkpoints.
+
+`NeuralSH.forward` concatenates the global `probe_features` vector to every sample and
+multiplies it by `hidden_layer` again for every sample, although that product is the
+same for the whole batch. The engine folds it into the first-layer bias once, so the
+first GEMM only sees the 18 encoded inputs instead of 1268 columns.
+
+`NeuralSHGridInference` runs `neural_sh.NeuralSHGrid` checkpoints through the same
+chunked MLP, with the multi-resolution feature grid gathered per chunk.
+"""
+import argparse
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from constants import ENCODED_ANGLE_DIM, ENCODED_POS_DIM, GRID_HASH_PRIMES, L_ANGLE, L_POS
+
+
+def layer_names(state_dict: Dict) -> List[str]:
+  """Linear layer names of a checkpoint in evaluation order: hidden_layer, hidden_layer2, ..., output_layer."""
+  hidden = [k[: -len(".weight")] for k in state_dict if re.fullmatch(r"hidden_layer\d*\.weight", k)]
+  hidden.sort(key=lambda name: int(name[len("hidden_layer"):] or 1))
+  return hidden + ["output_layer"]
+
+
+def to_numpy(value) -> np.ndarray:
+  """A state dict entry (tensor or array) as a NumPy array on the host."""
+  if hasattr(value, "detach"):
+    value = value.detach().cpu().numpy()
+  return np.asarray(value)
+
+
+def fold_probe_features(state_dict: Dict) -> List[Tuple[np.ndarray, np.ndarray]]:
+  """Layers as (weight (out, in), bias (out,)) float32 pairs with the probe features folded in.
+
+  The first layer keeps only its encoded-input columns; its bias absorbs
+  hidden_layer.weight[:, encoded:] @ probe_features (accumulated in float64).
+  """
+  names = layer_names(state_dict)
+  layers = [(to_numpy(state_dict[f"{n}.weight"]), to_numpy(state_dict[f"{n}.bias"])) for n in names]
+
+  probe_features = to_numpy(state_dict["probe_features"])
+  weight, bias = layers[0]
+  encoded_dim = weight.shape[1] - probe_features.shape[0]
+  folded_bias = bias.astype(np.float64) + weight[:, encoded_dim:].astype(np.float64) @ probe_features.astype(np.float64)
+  layers[0] = (weight[:, :encoded_dim], folded_bias)
+
+  return [(w.astype(np.float32), b.astype(np.float32)) for w, b in layers]
+
+
+def encoding_frequencies(L: int) -> np.ndarray:
+  """Frequencies of the trigonometric encoding: the constants of NeuralSH.trigonometric_encoding, 2**i * pi, rounded to float32."""
+  return np.array([2**i * np.pi for i in range(L)], dtype=np.float32)
+
+
+class NeuralSHInference:
+  """Batched NumPy forward pass of a NeuralSH checkpoint.
+
+  Inputs are processed in fixed-size chunks through buffers allocated once, so
+  throughput does not depend on allocator behaviour and peak memory is bounded by
+  `chunk_size` regardless of the number of samples.
+  """
+
+  def __init__(self, state_dict: Dict, chunk_size: int = 16384):
+    self._setup(fold_probe_features(state_dict), chunk_size)
+    assert self.weights_t[0].shape[0] == ENCODED_POS_DIM + ENCODED_ANGLE_DIM
+
+  def _setup(self, layers: List[Tuple[np.ndarray, np.ndarray]], chunk_size: int) -> None:
+    self.layers = layers
+    # (in, out) contiguous copies: x @ W.T without a transpose per call
+    self.weights_t = [np.ascontiguousarray(w.T) for w, _ in self.layers]
+    self.biases = [b for _, b in self.layers]
+    self.chunk_size = chunk_size
+
+    self.pos_freqs = encoding_frequencies(L_POS)
+    self.angle_freqs = encoding_frequencies(L_ANGLE)
+    encoded_dim = self.weights_t[0].shape[0]
+
+    # Preallocated work buffers
+    self._enc = np.empty((chunk_size, encoded_dim), dtype=np.float32)
+    self._pos_arg = np.empty((chunk_size, L_POS, 3), dtype=np.float32)
+    self._angle_arg = np.empty((chunk_size, L_ANGLE, 1), dtype=np.float32)
+    self._act = [np.empty((chunk_size, w.shape[1]), dtype=np.float32) for w in self.weights_t]
+
+  @classmethod
+  def from_checkpoint(cls, path: str | Path, chunk_size: int = 16384) -> "NeuralSHInference":
+    import torch
+    return cls(torch.load(path, map_location="cpu"), chunk_size=chunk_size)
+
+  @property
+  def output_dim(self) -> int:
+    return self.weights_t[-1].shape[1]
+
+  def _encode(self, pos: np.ndarray, angle: np.ndarray) -> np.ndarray:
+    n = pos.shape[0]
+    enc = self._enc[:n]
+    # Layout per frequency i: sin(x, y, z), cos(x, y, z), ..., then the angle: sin, cos, ...
+    pos_enc = enc[:, :ENCODED_POS_DIM].reshape(n, L_POS, 2, 3)
+    angle_enc = enc[:, ENCODED_POS_DIM : ENCODED_POS_DIM + ENCODED_ANGLE_DIM].reshape(n, L_ANGLE, 2, 1)
+    for x, freqs, arg, out in (
+      (pos, self.pos_freqs, self._pos_arg[:n], pos_enc),
+      (angle, self.angle_freqs, self._angle_arg[:n], angle_enc),
+    ):
+      np.multiply(freqs[None, :, None], x[:, None, :], out=arg)
+      np.sin(arg, out=out[:, :, 0, :])
+      np.cos(arg, out=out[:, :, 1, :])
+    return enc
+
+  def _forward_chunk(self, pos: np.ndarray, angle: np.ndarray, out: np.ndarray) -> None:
+    n = pos.shape[0]
+    x = self._encode(pos, angle)
+    last = len(self.weights_t) - 1
+    for i, (w_t, b) in enumerate(zip(self.weights_t, self.biases)):
+      y = out if i == last else self._act[i][:n]
+      np.matmul(x, w_t, out=y)
+      y += b
+      if i != last:
+        # sigmoid in place: 1 / (1 + exp(-y)); exp overflow saturates to 0 as intended
+        with np.errstate(over="ignore"):
+          np.negative(y, out=y)
+          np.exp(y, out=y)
+          y += 1.0
+          np.reciprocal(y, out=y)
+      x = y
+
+  def forward(self, pos: np.ndarray, angle: np.ndarray) -> np.ndarray:
+    """pos (N, 3), angle (N, 1) -> SH (N, 27) float32, matching NeuralSH.forward."""
+    pos = np.asarray(pos, dtype=np.float32).reshape(-1, 3)
+    angle = np.asarray(angle, dtype=np.float32).reshape(-1, 1)
+    assert pos.shape[0] == angle.shape[0]
+
+    out = np.empty((pos.shape[0], self.output_dim), dtype=np.float32)
+    for start in range(0, pos.shape[0], self.chunk_size):
+      stop = min(start + self.chunk_size, pos.shape[0])
+      self._forward_chunk(pos[start:stop], angle[start:stop], out[start:stop])
+    return out
+
+  __call__ = forward
+
+  def throughput(self, n: int = 1 << 20, repeats: int = 3, seed: int = 0) -> float:
+    """Best-of-`repeats` samples per second on `n` random inputs."""
+    rng = np.random.default_rng(seed)
+    pos = rng.random((n, 3), dtype=np.float32)
+    angle = rng.random((n, 1), dtype=np.float32)
+    self.forward(pos[: self.chunk_size], angle[: self.chunk_size]) # warm-up
+    best = float("inf")
+    for _ in range(repeats):
+      start = time.perf_counter()
+      self.forward(pos, angle)
+      best = min(best, time.perf_counter() - start)
+    return n / best
+
+
+class NeuralSHGridInference(NeuralSHInference):
+  """Batched NumPy forward pass of a NeuralSHGrid checkpoint.
+
+  The grid features of every level are written straight into the encoded-input buffer
+  after the trigonometric encoding, so the MLP path is the one of `NeuralSHInference`.
+  """
+
+  def __init__(self, state_dict: Dict, chunk_size: int = 16384):
+    names = layer_names(state_dict)
+    self._setup([(to_numpy(state_dict[f"{n}.weight"]).astype(np.float32), to_numpy(state_dict[f"{n}.bias"]).astype(np.float32)) for n in names], chunk_size)
+
+    self.resolutions = [int(r) for r in to_numpy(state_dict["encoding.resolutions"])]
+    self.tables = [to_numpy(state_dict[f"encoding.tables.{i}"]).astype(np.float32) for i in range(len(self.resolutions))]
+    self.features_per_level = self.tables[0].shape[1]
+    grid_dim = len(self.tables) * self.features_per_level
+    assert self.weights_t[0].shape[0] == ENCODED_POS_DIM + ENCODED_ANGLE_DIM + grid_dim
+
+    self._corners = np.array([(i & 1, (i >> 1) & 1, (i >> 2) & 1) for i in range(8)], dtype=np.int64)
+    self._primes = np.array(GRID_HASH_PRIMES, dtype=np.int64)
+
+  def _grid_level(self, pos: np.ndarray, res: int, table: np.ndarray, out: np.ndarray) -> None:
+    x = np.clip(pos, 0.0, 1.0) * np.float32(res)
+    x0 = np.minimum(np.floor(x), np.float32(res - 1))
+    t = x - x0
+
+    vertex = x0.astype(np.int64)[:, None, :] + self._corners[None] # (n, 8, 3)
+    weight = np.where(self._corners[None].astype(bool), t[:, None, :], 1.0 - t[:, None, :]).prod(axis=-1)
+
+    if (res + 1) ** 3 <= table.shape[0]:
+      index = vertex[..., 0] + (res + 1) * (vertex[..., 1] + (res + 1) * vertex[..., 2])
+    else:
+      hashed = vertex * self._primes
+      index = (hashed[..., 0] ^ hashed[..., 1] ^ hashed[..., 2]) & (table.shape[0] - 1)
+    np.einsum("nkf,nk->nf", table[index], weight, out=out)
+
+  def _encode(self, pos: np.ndarray, angle: np.ndarray) -> np.ndarray:
+    enc = super()._encode(pos, angle)
+    start = ENCODED_POS_DIM + ENCODED_ANGLE_DIM
+    for res, table in zip(self.resolutions, self.tables):
+      self._grid_level(pos, res, table, enc[:, start : start + self.features_per_level])
+      start += self.features_per_level
+    return enc
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Check the folded NeuralSH engine against the model and report throughput.")
+  parser.add_argument("checkpoint", nargs="?", default="best_model.pth")
+  parser.add_argument("--samples", type=int, default=1 << 20)
+  parser.add_argument("--chunk-size", type=int, default=16384)
+  args = parser.parse_args()
+
+  import torch
+  from neural_sh import NeuralSH
+
+  state_dict = torch.load(args.checkpoint, map_location="cpu")
+  engine = NeuralSHInference(state_dict, chunk_size=args.chunk_size)
+
+  model = NeuralSH()
+  model.load_state_dict(state_dict)
+  model.eval()
+
+  rng = np.random.default_rng(0)
+  pos = rng.random((4096, 3), dtype=np.float32)
+  angle = rng.random((4096, 1), dtype=np.float32)
+  with torch.no_grad():
+    expected = model(torch.from_numpy(pos), torch.from_numpy(angle)).numpy()
+  max_err = np.abs(engine(pos, angle) - expected).max()
+  print(f"max abs error vs NeuralSH.forward: {max_err:.3e}")
+
+  samples_per_sec = engine.throughput(n=args.samples)
+  print(f"throughput: {samples_per_sec / 1e6:.3f} M samples/s (chunk size {args.chunk_size})")
+
+
+if __name__ == "__main__":
+  main()
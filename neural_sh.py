@@ -0,0 +1,166 @@
+import math
+from typing import List
+
+import torch
+from torch import nn
+
+from constants import (
+  ENCODED_ANGLE_DIM,
+  ENCODED_POS_DIM,
+  GRID_BASE_RESOLUTION,
+  GRID_FEATURES_PER_LEVEL,
+  GRID_HASH_PRIMES,
+  GRID_LEVELS,
+  GRID_LOG2_TABLE_SIZE,
+  GRID_MAX_RESOLUTION,
+  GRID_MLP_HIDDEN_LAYER_WIDTH,
+  INPUT_DIM,
+  L_ANGLE,
+  L_POS,
+  MLP_HIDDEN_LAYER_WIDTH,
+  PROBES_COUNT,
+  PROBES_DIM_X,
+  PROBES_DIM_Y,
+  PROBES_DIM_Z,
+  SH_FLOAT_COUNT,
+)
+
+
+def trigonometric_encoding(x: torch.Tensor, L: int):
+  assert x.ndim == 2
+  y = []
+  for i in range(L):
+    s = torch.sin(2**i * torch.pi * x)
+    c = torch.cos(2**i * torch.pi * x)
+    y.append(s)
+    y.append(c)
+  y = torch.cat(y, dim=1)
+  return y
+
+
+class NeuralSH(nn.Module):
+  def __init__(self):
+    super(NeuralSH, self).__init__()
+    self.probe_features = nn.Parameter(torch.rand(PROBES_COUNT), requires_grad=True)
+
+    self.hidden_layer = nn.Linear(INPUT_DIM, MLP_HIDDEN_LAYER_WIDTH)
+    self.hidden_layer2 = nn.Linear(MLP_HIDDEN_LAYER_WIDTH, MLP_HIDDEN_LAYER_WIDTH)
+    self.hidden_layer3 = nn.Linear(MLP_HIDDEN_LAYER_WIDTH, MLP_HIDDEN_LAYER_WIDTH)
+
+    self.output_layer = nn.Linear(MLP_HIDDEN_LAYER_WIDTH, SH_FLOAT_COUNT)
+
+  def trigonometric_encoding(self, x: torch.Tensor, L: int):
+    return trigonometric_encoding(x, L)
+
+  def forward(self, pos, angle):
+    assert pos.ndim == 2
+    assert angle.ndim == 2
+
+    pos = pos.view(-1, 3)
+    angle = angle.view(-1, 1)
+
+    assert pos.shape[0] == angle.shape[0]
+    batch_size = pos.shape[0]
+
+    pos_enc = self.trigonometric_encoding(pos, L=L_POS)
+    angle_enc = self.trigonometric_encoding(angle, L=L_ANGLE)
+
+    x = torch.cat([pos_enc, angle_enc, self.probe_features.repeat(batch_size, 1)], dim=1)
+    x = torch.sigmoid(self.hidden_layer(x))
+    x = torch.sigmoid(self.hidden_layer2(x))
+    x = torch.sigmoid(self.hidden_layer3(x))
+    x = self.output_layer(x)
+    return x
+
+
+def grid_resolutions(levels: int, base_resolution: int, max_resolution: int) -> List[int]:
+  """Cells per axis of every level, growing geometrically from base to max resolution."""
+  growth = (max_resolution / base_resolution) ** (1 / (levels - 1)) if levels > 1 else 1.0
+  return [int(math.floor(base_resolution * growth**level + 1e-6)) for level in range(levels)]
+
+
+class MultiResFeatureGrid(nn.Module):
+  """Learned multi-resolution 3D feature grid, sampled trilinearly at positions in [0,1]^3.
+
+  Every level is a table of `features_per_level` features per grid vertex. Levels whose
+  (res+1)^3 vertices fit in 2^log2_table_size entries are dense, finer levels are hashed
+  into a table of that size. The resolutions are stored as a buffer so a checkpoint fully
+  describes the grid.
+  """
+  def __init__(
+    self,
+    levels=GRID_LEVELS,
+    features_per_level=GRID_FEATURES_PER_LEVEL,
+    log2_table_size=GRID_LOG2_TABLE_SIZE,
+    base_resolution=GRID_BASE_RESOLUTION,
+    max_resolution=GRID_MAX_RESOLUTION,
+  ):
+    super(MultiResFeatureGrid, self).__init__()
+    resolutions = grid_resolutions(levels, base_resolution, max_resolution)
+    self.register_buffer("resolutions", torch.tensor(resolutions, dtype=torch.int64))
+    self.features_per_level = features_per_level
+    self.tables = nn.ParameterList([
+      nn.Parameter(torch.empty(min((res + 1) ** 3, 2**log2_table_size), features_per_level).uniform_(-1e-4, 1e-4))
+      for res in resolutions
+    ])
+    corners = [(i & 1, (i >> 1) & 1, (i >> 2) & 1) for i in range(8)]
+    self.register_buffer("corners", torch.tensor(corners, dtype=torch.int64), persistent=False)
+
+  @property
+  def output_dim(self) -> int:
+    return len(self.tables) * self.features_per_level
+
+  def forward(self, pos):
+    assert pos.ndim == 2 and pos.shape[1] == 3
+    features = []
+    for res, table in zip(self.resolutions.tolist(), self.tables):
+      x = pos.clamp(0.0, 1.0) * res
+      x0 = x.floor().clamp(max=res - 1)
+      t = x - x0
+
+      # (N, 8, 3) corner vertices and their trilinear weights
+      vertex = x0.to(torch.int64)[:, None, :] + self.corners[None]
+      weight = torch.where(self.corners[None].bool(), t[:, None, :], 1.0 - t[:, None, :]).prod(dim=-1)
+
+      if (res + 1) ** 3 <= table.shape[0]:
+        index = vertex[..., 0] + (res + 1) * (vertex[..., 1] + (res + 1) * vertex[..., 2])
+      else:
+        index = (vertex[..., 0] * GRID_HASH_PRIMES[0]) ^ (vertex[..., 1] * GRID_HASH_PRIMES[1]) ^ (vertex[..., 2] * GRID_HASH_PRIMES[2])
+        index = index & (table.shape[0] - 1)
+      features.append((table[index] * weight[..., None]).sum(dim=1))
+    return torch.cat(features, dim=1)
+
+
+class NeuralSHGrid(nn.Module):
+  """NeuralSH with the global probe_features vector replaced by a MultiResFeatureGrid.
+
+  Each sample only reads 8 vertices per level, so the per-sample cost no longer grows with
+  the probe count. Same forward(pos, angle) contract as NeuralSH.
+  """
+  def __init__(self, hidden_width=GRID_MLP_HIDDEN_LAYER_WIDTH, **grid_kwargs):
+    super(NeuralSHGrid, self).__init__()
+    self.encoding = MultiResFeatureGrid(**grid_kwargs)
+    input_dim = ENCODED_POS_DIM + ENCODED_ANGLE_DIM + self.encoding.output_dim
+
+    self.hidden_layer = nn.Linear(input_dim, hidden_width)
+    self.hidden_layer2 = nn.Linear(hidden_width, hidden_width)
+
+    self.output_layer = nn.Linear(hidden_width, SH_FLOAT_COUNT)
+
+  def forward(self, pos, angle):
+    assert pos.ndim == 2
+    assert angle.ndim == 2
+
+    pos = pos.view(-1, 3)
+    angle = angle.view(-1, 1)
+
+    assert pos.shape[0] == angle.shape[0]
+
+    pos_enc = trigonometric_encoding(pos, L=L_POS)
+    angle_enc = trigonometric_encoding(angle, L=L_ANGLE)
+
+    x = torch.cat([pos_enc, angle_enc, self.encoding(pos)], dim=1)
+    x = torch.sigmoid(self.hidden_layer(x))
+    x = torch.sigmoid(self.hidden_layer2(x))
+    x = self.output_layer(x)
+    return x
@@ -0,0 +1,170 @@
+"""Post-training fp16 / int8 quantization of NeuralSH checkpoints.
+
+The layers are quantized after folding the probe features into the first-layer bias (see
+inference.fold_probe_features), i.e. exactly the tensors a shader fetches:
+
+  fp16  weights and biases stored as half floats
+  int8  weights stored as int8 with one float32 scale per output channel
+        (symmetric, scale = max |w| / 127); biases stay float32
+
+The reference forward pass dequantizes the stored weights once and then runs the fp32
+`NeuralSHInference` path. That matches a shader that fetches the compact weights and
+accumulates in fp32. `accuracy_report` compares each precision with the fp32 model using the
+per-field MSE plotted by the notebook, and `smallest_precision` picks the most compact one
+under an error threshold.
+"""
+import argparse
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from constants import PROBES_DIM_X, PROBES_DIM_Y, PROBES_DIM_Z
+from inference import NeuralSHInference, fold_probe_features
+from sh_volume import split_sh
+
+
+PRECISIONS = ("fp32", "fp16", "int8") # largest to smallest
+
+INT8_MAX = 127
+
+
+@dataclass
+class QuantizedLayer:
+  weight: np.ndarray # (out, in): float32, float16 or int8
+  bias: np.ndarray # (out,)
+  scale: Optional[np.ndarray] = None # (out,) float32 per-output-channel scale, int8 only
+
+  @property
+  def nbytes(self) -> int:
+    return self.weight.nbytes + self.bias.nbytes + (0 if self.scale is None else self.scale.nbytes)
+
+  def dequantize(self) -> Tuple[np.ndarray, np.ndarray]:
+    """(weight, bias) as float32."""
+    weight = self.weight.astype(np.float32)
+    if self.scale is not None:
+      weight *= self.scale[:, None]
+    return weight, self.bias.astype(np.float32)
+
+
+def quantize_layer(weight: np.ndarray, bias: np.ndarray, precision: str) -> QuantizedLayer:
+  if precision == "fp32":
+    return QuantizedLayer(weight.astype(np.float32), bias.astype(np.float32))
+  elif precision == "fp16":
+    return QuantizedLayer(weight.astype(np.float16), bias.astype(np.float16))
+  elif precision == "int8":
+    max_abs = np.abs(weight).max(axis=1)
+    scale = np.where(max_abs > 0, max_abs / INT8_MAX, 1.0).astype(np.float32)
+    q = np.clip(np.rint(weight / scale[:, None]), -INT8_MAX, INT8_MAX).astype(np.int8)
+    return QuantizedLayer(q, bias.astype(np.float32), scale)
+  else:
+    raise ValueError(f"{precision} not supported!")
+
+
+def quantize_checkpoint(state_dict: Dict, precision: str) -> List[QuantizedLayer]:
+  """Folded layers of a NeuralSH state dict, quantized to `precision`."""
+  return [quantize_layer(w, b, precision) for w, b in fold_probe_features(state_dict)]
+
+
+def save_quantized(layers: List[QuantizedLayer], path: str | Path) -> None:
+  arrays = {}
+  for i, layer in enumerate(layers):
+    arrays[f"weight{i}"] = layer.weight
+    arrays[f"bias{i}"] = layer.bias
+    if layer.scale is not None:
+      arrays[f"scale{i}"] = layer.scale
+  np.savez(path, **arrays)
+
+
+def load_quantized(path: str | Path) -> List[QuantizedLayer]:
+  with np.load(path) as f:
+    count = sum(1 for k in f.files if k.startswith("weight"))
+    return [QuantizedLayer(f[f"weight{i}"], f[f"bias{i}"], f[f"scale{i}"] if f"scale{i}" in f.files else None) for i in range(count)]
+
+
+class QuantizedNeuralSHInference(NeuralSHInference):
+  """`NeuralSHInference` running on the dequantized weights of a quantized checkpoint."""
+
+  def __init__(self, state_dict: Dict, precision: str = "int8", chunk_size: int = 16384):
+    self.precision = precision
+    self.quantized = quantize_checkpoint(state_dict, precision)
+    self._setup([layer.dequantize() for layer in self.quantized], chunk_size)
+
+  @property
+  def nbytes(self) -> int:
+    """Size of the stored (quantized) weights."""
+    return sum(layer.nbytes for layer in self.quantized)
+
+
+def field_mse(reference: np.ndarray, predicted: np.ndarray) -> Dict[str, float]:
+  """Mean over texels of the notebook's per-texel MSE map, for every texture field."""
+  reference, predicted = split_sh(reference), split_sh(predicted)
+  return {name: float(np.mean(np.mean((reference[name] - predicted[name]) ** 2, axis=-1))) for name in reference}
+
+
+def accuracy_report(
+  state_dict: Dict,
+  positions: np.ndarray,
+  angles: np.ndarray,
+  true_sh: Optional[np.ndarray] = None,
+  precisions: Sequence[str] = PRECISIONS,
+) -> Dict:
+  """Per-field MSE of every precision against the fp32 model (and the bake, if `true_sh` is given)."""
+  fp32 = NeuralSHInference(state_dict)(positions, angles)
+  report = {}
+  for precision in precisions:
+    engine = QuantizedNeuralSHInference(state_dict, precision=precision)
+    pred = engine(positions, angles)
+    entry = {
+      "bytes": engine.nbytes,
+      "mse_vs_fp32": field_mse(fp32, pred),
+      "max_abs_vs_fp32": float(np.abs(pred - fp32).max()),
+    }
+    if true_sh is not None:
+      entry["mse_vs_bake"] = field_mse(true_sh, pred)
+    report[precision] = entry
+  return report
+
+
+def smallest_precision(report: Dict, threshold: float) -> str:
+  """Most compact precision whose per-field MSE against fp32 stays under `threshold` in every field."""
+  fitting = [p for p in PRECISIONS if p in report and max(report[p]["mse_vs_fp32"].values()) < threshold]
+  return fitting[-1] if fitting else "fp32"
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Quantize a NeuralSH checkpoint and report accuracy against fp32.")
+  parser.add_argument("checkpoint", nargs="?", default="best_model.pth")
+  parser.add_argument("--data", default=None, help="bake directory; evaluates at its probe centers against the bake too")
+  parser.add_argument("--angle", type=float, default=0.0)
+  parser.add_argument("--threshold", type=float, default=1e-5, help="largest acceptable per-field MSE vs fp32")
+  parser.add_argument("--output", default=None, help="save the chosen precision's layers to this .npz")
+  args = parser.parse_args()
+
+  import torch
+  from evaluate import probe_centers
+  from sh_volume import SHVolume
+
+  state_dict = torch.load(args.checkpoint, map_location="cpu")
+  true_sh = None
+  if args.data is not None:
+    volume = SHVolume.load(args.data)
+    grid_shape = (volume.meta.depth, volume.meta.height, volume.meta.width)
+    true_sh = volume.data.reshape(-1, volume.data.shape[-1])
+  else:
+    grid_shape = (PROBES_DIM_Z, PROBES_DIM_Y, PROBES_DIM_X)
+  positions = probe_centers(grid_shape)
+  angles = np.full((positions.shape[0], 1), args.angle, dtype=np.float32)
+
+  report = accuracy_report(state_dict, positions, angles, true_sh)
+  chosen = smallest_precision(report, args.threshold)
+  print(json.dumps(report, indent=2))
+  print(f"smallest precision under {args.threshold:g} per-field MSE: {chosen} ({report[chosen]['bytes']} bytes)")
+  if args.output is not None:
+    save_quantized(quantize_checkpoint(state_dict, chosen), args.output)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,79 @@
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+
+from constants import SH_FLOAT_COUNT
+from texture_sampler import Texture, TextureMetadata, load_texture_by_name, sample_uvw_batch
+
+
+# Texture field -> (file name in the bake directory, channels of the fused volume it fills)
+# The fused channel order is the one the model is trained on:
+#   [Ambient.x, SH0Red, SH1Red, Ambient.y, SH0Green, SH1Green, Ambient.z, SH0Blue, SH1Blue]
+SH_TEXTURE_LAYOUT: Dict[str, Tuple[str, np.ndarray]] = {
+  "AmbientVector": ("AmbientVector", np.array([0, 9, 18])),
+
+  "SHCoefficients0Red": ("SHCoefficients_0", np.arange(1, 5)),
+  "SHCoefficients0Green": ("SHCoefficients_2", np.arange(10, 14)),
+  "SHCoefficients0Blue": ("SHCoefficients_4", np.arange(19, 23)),
+
+  "SHCoefficients1Red": ("SHCoefficients_1", np.arange(5, 9)),
+  "SHCoefficients1Green": ("SHCoefficients_3", np.arange(14, 18)),
+  "SHCoefficients1Blue": ("SHCoefficients_5", np.arange(23, 27)),
+}
+
+
+def split_sh(sh: np.ndarray) -> Dict[str, np.ndarray]:
+  """Split (..., 27) SH values back into the per-texture channel layout."""
+  assert sh.shape[-1] == SH_FLOAT_COUNT
+  return {name: sh[..., channels] for name, (_, channels) in SH_TEXTURE_LAYOUT.items()}
+
+
+@dataclass
+class SHVolume:
+  """The seven SH textures of a bake fused into one contiguous (D, H, W, 27) volume.
+
+  One 27-wide gather per corner replaces seven 3- or 4-wide gathers, and the
+  interleaving into the model's channel order happens once at load time.
+  """
+  meta: TextureMetadata
+  data: np.ndarray # (Depth, Height, Width, 27), float32
+
+  @classmethod
+  def from_textures(cls, textures: Dict[str, Texture]) -> "SHVolume":
+    first = textures["AmbientVector"]
+    depth, height, width, _ = first.data.shape
+    data = np.empty((depth, height, width, SH_FLOAT_COUNT), dtype=np.float32)
+    for name, (_, channels) in SH_TEXTURE_LAYOUT.items():
+      tex = textures[name]
+      if tex.data.shape[:3] != (depth, height, width):
+        raise ValueError(f"{name} is {tex.data.shape[:3]}, expected {(depth, height, width)}")
+      # Slice by slice, so lazily decoded (mmap) textures are never fully materialized
+      for z in range(depth):
+        data[z][..., channels] = tex.data[z]
+    meta = replace(first.meta, pixel_format="SH3_FLOAT", bytes_per_pixel=data.itemsize * SH_FLOAT_COUNT, total_bytes=data.nbytes)
+    return cls(meta=meta, data=data)
+
+  @classmethod
+  def load(cls, tex_dir: str | Path, mmap: bool = False) -> "SHVolume":
+    textures = {name: load_texture_by_name(tex_dir, file_name, mmap=mmap) for name, (file_name, _) in SH_TEXTURE_LAYOUT.items()}
+    return cls.from_textures(textures)
+
+  @property
+  def texture(self) -> Texture:
+    return Texture(meta=self.meta, data=self.data)
+
+  def sample(self, uvw: np.ndarray, method: str = "trilinear") -> np.ndarray:
+    """Sample all 27 SH floats at (N, 3) UVWs in [0,1], returns (N, 27)."""
+    return sample_uvw_batch(self.texture, uvw, method=method)
+
+  def split(self) -> Dict[str, np.ndarray]:
+    """Per-texture (D, H, W, C) arrays, in the same layout the textures were loaded with."""
+    return split_sh(self.data)
+
+  def to_volume(self, sh: np.ndarray) -> "SHVolume":
+    """Wrap (D*H*W, 27) SH values in texture order (x fastest, z slowest) as a volume of this shape."""
+    assert sh.ndim == 2 and sh.shape[1] == SH_FLOAT_COUNT
+    data = sh.reshape(self.meta.depth, self.meta.height, self.meta.width, SH_FLOAT_COUNT)
+    return SHVolume(meta=self.meta, data=data)
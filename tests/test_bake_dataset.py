@@ -0,0 +1,20 @@
+"""Ingestion of bakes into a sharded dataset."""
+import numpy as np
+
+from bake_dataset import ShardedSHDataset, ingest_bakes
+from benchmark import write_synthetic_bake
+
+
+def test_rebake_replaces_entry(tmp_path):
+  bake_dir, out_dir = tmp_path / "bake", tmp_path / "dataset"
+  shape = (2, 5, 10)
+  write_synthetic_bake(bake_dir, shape, np.random.default_rng(0))
+  first = ingest_bakes([(bake_dir, 0.5)], out_dir, workers=1)
+  (old_key,) = first["bakes"]
+  old_files = [s["file"] for s in first["bakes"][old_key]["shards"]]
+
+  write_synthetic_bake(bake_dir, shape, np.random.default_rng(1))
+  manifest = ingest_bakes([(bake_dir, 0.5)], out_dir, workers=1)
+  assert old_key not in manifest["bakes"] and len(manifest["bakes"]) == 1
+  assert not any((out_dir / f).exists() for f in old_files)
+  assert len(ShardedSHDataset(out_dir)) == int(np.prod(shape))
@@ -0,0 +1,15 @@
+"""Synthetic inputs of the benchmark suite."""
+import numpy as np
+import pytest
+
+from benchmark import DEFAULT_FORMATS, write_synthetic_texture
+from texture_sampler import load_texture
+
+
+@pytest.mark.parametrize("pixel_format", DEFAULT_FORMATS + ("R16F", "G16R16F", "R32_FLOAT"))
+def test_synthetic_texture_loads(tmp_path, pixel_format):
+  shape = (2, 8, 12)
+  bin_path = write_synthetic_texture(tmp_path, "tex", pixel_format, shape, np.random.default_rng(0))
+  tex = load_texture(bin_path)
+  assert tex.data.shape[:3] == shape
+  assert np.isfinite(np.asarray(tex.data, dtype=np.float32)).all()
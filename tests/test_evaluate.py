@@ -0,0 +1,51 @@
+"""Streaming dense evaluation against a direct NumPy computation."""
+import numpy as np
+import pytest
+
+from constants import SH_FLOAT_COUNT
+from evaluate import HISTOGRAM_EDGES, SH_BANDS, SH_FIELDS, RunningErrorStats, evaluate_dense, probe_centers
+from sh_volume import SHVolume
+from texture_sampler import TextureMetadata
+
+BIN_RATIO = HISTOGRAM_EDGES[1] / HISTOGRAM_EDGES[0]
+
+
+@pytest.fixture
+def volume() -> SHVolume:
+  data = np.random.default_rng(0).random((3, 4, 5, SH_FLOAT_COUNT), dtype=np.float32)
+  meta = TextureMetadata(width=5, height=4, depth=3, pixel_format="SH3_FLOAT", bytes_per_pixel=4 * SH_FLOAT_COUNT, total_bytes=data.nbytes)
+  return SHVolume(meta, data)
+
+
+def test_matches_dense_numpy(tmp_path, volume):
+  def predict(pos, angle):
+    return volume.sample(pos, method="nearest") # disagrees with trilinear between probes
+
+  grid_shape = (7, 9, 11) # 693 samples, not a multiple of the chunk size
+  report = evaluate_dense(volume, predict, grid_shape=grid_shape, chunk_size=100, error_volume_path=tmp_path / "errors.npy")
+
+  uvw = probe_centers(grid_shape)
+  sq_err = np.square(predict(uvw, None) - volume.sample(uvw, method="trilinear"))
+  groups = {**{f"fields.{n}": c for n, c in SH_FIELDS.items()}, **{f"bands.{n}": c for n, c in SH_BANDS.items()}}
+  for name, channels in groups.items():
+    section, key = name.split(".")
+    errors = sq_err[:, channels].mean(axis=1)
+    stats = report[section][key]
+    np.testing.assert_allclose(stats["mse"], errors.mean(), rtol=1e-6)
+    np.testing.assert_allclose(stats["psnr"], 10 * np.log10(1.0 / errors.mean()), rtol=1e-6)
+    assert stats["max"] == errors.max()
+  assert report["samples"] == uvw.shape[0]
+
+  error_volume = np.load(tmp_path / "errors.npy")
+  expected = np.stack([sq_err[:, c].mean(axis=1) for c in SH_FIELDS.values()], axis=-1)
+  np.testing.assert_allclose(error_volume.reshape(-1, len(SH_FIELDS)), expected, rtol=1e-6)
+
+
+@pytest.mark.parametrize("q", [1, 50, 90, 99, 99.9])
+def test_percentiles_within_one_bin(q):
+  errors = np.random.default_rng(0).lognormal(-10, 2, 100_000)
+  stats = RunningErrorStats(np.arange(1))
+  for chunk in np.array_split(errors, 7):
+    stats.update(chunk)
+  expected = np.percentile(errors, q)
+  assert expected / BIN_RATIO <= stats.percentile(q) <= expected * BIN_RATIO
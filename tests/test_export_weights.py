@@ -0,0 +1,42 @@
+"""Round trip and validation of the binary weights blob."""
+import numpy as np
+import pytest
+import torch
+
+from export_weights import HEADER_DTYPE, export_weights, load_weights
+from inference import fold_probe_features
+from neural_sh import NeuralSH
+
+
+@pytest.fixture
+def state_dict():
+  torch.manual_seed(0)
+  return NeuralSH().state_dict()
+
+
+@pytest.mark.parametrize("fold", [True, False])
+def test_round_trip(tmp_path, state_dict, fold):
+  path = tmp_path / "weights.bin"
+  export_weights(state_dict, path, fold=fold)
+  blob = load_weights(path)
+  assert blob.folded == fold
+  expected = fold_probe_features(state_dict) if fold else [
+    (state_dict[f"{n}.weight"].numpy(), state_dict[f"{n}.bias"].numpy())
+    for n in ("hidden_layer", "hidden_layer2", "hidden_layer3", "output_layer")
+  ]
+  for (weight, bias), (expected_weight, expected_bias) in zip(blob.layers, expected):
+    np.testing.assert_array_equal(weight, expected_weight)
+    np.testing.assert_array_equal(bias, expected_bias)
+  if not fold:
+    np.testing.assert_array_equal(blob.probe_features, state_dict["probe_features"].numpy())
+
+
+def test_unknown_dtype_is_rejected(tmp_path, state_dict):
+  path = tmp_path / "weights.bin"
+  export_weights(state_dict, path)
+  raw = np.fromfile(path, dtype=np.uint8)
+  header = raw[: HEADER_DTYPE.itemsize].view(HEADER_DTYPE)
+  header["dtype"] = 7
+  raw.tofile(path)
+  with pytest.raises(ValueError, match="Unsupported weights dtype 7"):
+    load_weights(path)
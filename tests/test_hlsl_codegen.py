@@ -0,0 +1,33 @@
+"""The NumPy emulation of the generated shader against the PyTorch model."""
+import numpy as np
+import pytest
+import torch
+
+from export_weights import export_weights, load_weights
+from hlsl_codegen import TILE_SAMPLES, dispatch_group_count, emulate, generate_shader
+from neural_sh import NeuralSH
+
+
+@pytest.mark.parametrize("dtype, tolerance", [("fp32", 1e-5), ("fp16", 1e-3)])
+def test_emulate_matches_forward(tmp_path, dtype, tolerance):
+  torch.manual_seed(0)
+  model = NeuralSH().eval()
+  path = tmp_path / "weights.bin"
+  export_weights(model.state_dict(), path, dtype=dtype)
+
+  rng = np.random.default_rng(0)
+  pos = rng.random((1024, 3), dtype=np.float32)
+  angle = rng.random((1024, 1), dtype=np.float32)
+  with torch.no_grad():
+    expected = model(torch.from_numpy(pos), torch.from_numpy(angle)).numpy()
+  np.testing.assert_allclose(emulate(load_weights(path), pos, angle), expected, rtol=0, atol=tolerance)
+
+
+def test_shader_states_dispatch_group_count(tmp_path):
+  torch.manual_seed(0)
+  path = tmp_path / "weights.bin"
+  export_weights(NeuralSH().state_dict(), path)
+  shader = generate_shader(load_weights(path))
+  assert f"dispatch (NumSamples + {TILE_SAMPLES - 1}) / {TILE_SAMPLES} groups" in shader
+  assert f"static const uint TILE_SAMPLES = {TILE_SAMPLES};" in shader
+  assert dispatch_group_count(1) == 1 and dispatch_group_count(TILE_SAMPLES + 1) == 2
@@ -0,0 +1,31 @@
+"""Change detection and fine-tuning after a partial re-bake."""
+import numpy as np
+import torch
+
+from benchmark import write_synthetic_bake
+from incremental import BakeSignature, retrain_incremental
+from neural_sh import NeuralSH
+from sh_volume import SHVolume
+from texture_writer import write_sh_volume
+
+
+def test_retrain_only_changed_region(tmp_path):
+  old_dir, new_dir = tmp_path / "old", tmp_path / "new"
+  write_synthetic_bake(old_dir, (4, 8, 20), np.random.default_rng(0))
+  previous = BakeSignature.from_bake(old_dir, region_size=(4, 4, 4))
+
+  sh = np.array(SHVolume.load(old_dir).data)
+  sh[:, :4, :4] = 0.5
+  write_sh_volume(sh, new_dir)
+
+  torch.manual_seed(0)
+  signature_path = tmp_path / "model.bake.json"
+  _, diff, history = retrain_incremental(
+    NeuralSH(), new_dir, previous, checkpoint_path=tmp_path / "model.pth",
+    signature_path=signature_path, max_epochs=2, seed=0,
+  )
+  assert diff.changed_regions.sum() == 1 and diff.changed_regions[0, 0, 0]
+  assert history["epochs"] == 2 and len(history["train_loss"]) == 2
+
+  _, unchanged, history = retrain_incremental(NeuralSH(), new_dir, BakeSignature.load(signature_path))
+  assert not unchanged.changed_regions.any() and history is None
@@ -0,0 +1,50 @@
+"""The NumPy inference engine."""
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+import torch
+
+from inference import NeuralSHGridInference, NeuralSHInference
+from neural_sh import NeuralSH, NeuralSHGrid
+
+
+@pytest.mark.parametrize("module", ["inference", "export_weights", "hlsl_codegen", "quantize"])
+def test_imports_without_torch(module):
+  # A None entry in sys.modules makes `import torch` raise ImportError
+  code = f"import sys; sys.modules['torch'] = None; import {module}"
+  subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).parents[1], check=True)
+
+
+def test_grid_engine_matches_forward():
+  torch.manual_seed(0)
+  # Resolutions 4, 8, 16, 32 with 2^10 entries per table: the first two levels are dense,
+  # the last two hashed
+  model = NeuralSHGrid(levels=4, log2_table_size=10, base_resolution=4, max_resolution=32).eval()
+  dense = [(res + 1) ** 3 <= table.shape[0] for res, table in zip(model.encoding.resolutions.tolist(), model.encoding.tables)]
+  assert dense == [True, True, False, False]
+  with torch.no_grad():
+    for table in model.encoding.tables: # features large enough to matter next to the encoding
+      table.uniform_(-1.0, 1.0)
+
+  rng = np.random.default_rng(0)
+  pos = rng.uniform(-0.1, 1.1, (1000, 3)).astype(np.float32) # includes clamped positions
+  angle = rng.random((1000, 1), dtype=np.float32)
+  with torch.no_grad():
+    expected = model(torch.from_numpy(pos), torch.from_numpy(angle)).numpy()
+  engine = NeuralSHGridInference(model.state_dict(), chunk_size=256)
+  np.testing.assert_allclose(engine(pos, angle), expected, rtol=1e-5, atol=1e-6)
+
+
+def test_engine_matches_forward():
+  torch.manual_seed(0)
+  model = NeuralSH().eval() # random probe_features, folded into the first-layer bias by the engine
+  rng = np.random.default_rng(0)
+  pos = rng.random((1000, 3), dtype=np.float32)
+  angle = rng.random((1000, 1), dtype=np.float32)
+  with torch.no_grad():
+    expected = model(torch.from_numpy(pos), torch.from_numpy(angle)).numpy()
+  engine = NeuralSHInference(model.state_dict(), chunk_size=256)
+  np.testing.assert_allclose(engine(pos, angle), expected, rtol=1e-5, atol=1e-6)
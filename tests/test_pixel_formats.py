@@ -0,0 +1,50 @@
+"""Pixel-format decoding: BC6H reference blocks and consistency of the native (compact) mode."""
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from bc6h import decode_bc6h_blocks
+from texture_sampler import _decode_r11g11b10_uint_to_float_rgb, _r11g11b10_to_half, load_texture
+
+
+DATA_DIR = Path(__file__).parent / "data"
+
+
+def test_bc6h_matches_reference_blocks():
+  # Four random blocks per mode code (all 14 modes and the 4 reserved codes), with the
+  # half-float bits decoded by bcdec (imagecodecs.bcn_decode(block, 6, shape=(4, 4, 3)))
+  with np.load(DATA_DIR / "bc6h_reference.npz") as ref:
+    blocks, expected = ref["blocks"], ref["expected"]
+  np.testing.assert_array_equal(decode_bc6h_blocks(blocks).view(np.uint16), expected)
+
+
+def test_r11g11b10_native_matches_float32():
+  bits = np.arange(1 << 11, dtype=np.uint32) # every 11-bit pattern in R and G, every 10-bit one in B
+  packed = bits | (bits << np.uint32(11)) | ((bits & np.uint32(0x3FF)) << np.uint32(22))
+  float32 = _decode_r11g11b10_uint_to_float_rgb(packed)
+  half = _r11g11b10_to_half(packed[:, None])
+  assert half.dtype == np.float16
+  np.testing.assert_array_equal(half.astype(np.float32), float32)
+
+
+def _write(tmp_path: Path, pixel_format: str, raw: np.ndarray) -> Path:
+  bin_path = tmp_path / f"{pixel_format}.bin"
+  raw.tofile(bin_path)
+  meta = {"Width": raw.nbytes // 4, "Height": 1, "Depth": 1, "PixelFormat": pixel_format,
+          "BytesPerPixel": 4, "TotalBytes": raw.nbytes}
+  bin_path.with_suffix(".json").write_text(json.dumps(meta), encoding="utf-8")
+  return bin_path
+
+
+@pytest.mark.parametrize("pixel_format,raw,scale", [
+  ("R8G8B8A8", np.arange(256 * 4, dtype=np.uint8), np.float32(255.0)),
+  ("A2B10G10R10", np.arange(0, 1 << 32, 65537, dtype=np.uint32), np.array([1023.0, 1023.0, 1023.0, 3.0], dtype=np.float32)),
+])
+def test_unorm_native_codes(tmp_path, pixel_format, raw, scale):
+  bin_path = _write(tmp_path, pixel_format, raw)
+  decoded = load_texture(bin_path).data
+  native = load_texture(bin_path, native=True).data
+  assert native.dtype.kind == "u" and native.itemsize < decoded.itemsize
+  np.testing.assert_array_equal(native.astype(np.float32) / scale, decoded)
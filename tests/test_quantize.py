@@ -0,0 +1,26 @@
+"""Quantized inference against the fp32 NumPy engine."""
+import numpy as np
+import pytest
+import torch
+
+from evaluate import probe_centers
+from inference import NeuralSHInference
+from neural_sh import NeuralSH
+from quantize import QuantizedNeuralSHInference
+
+
+@pytest.mark.parametrize("precision, tolerance", [("fp32", 0.0), ("fp16", 1e-3), ("int8", 2e-2)])
+def test_quantized_matches_fp32(precision, tolerance):
+  torch.manual_seed(0)
+  state_dict = NeuralSH().state_dict()
+  positions = probe_centers((2, 4, 8))
+  angles = np.full((positions.shape[0], 1), 0.25, dtype=np.float32)
+  expected = NeuralSHInference(state_dict)(positions, angles)
+  np.testing.assert_allclose(QuantizedNeuralSHInference(state_dict, precision)(positions, angles), expected, rtol=0, atol=tolerance)
+
+
+def test_probe_centers():
+  uvw = probe_centers((2, 3, 4))
+  assert uvw.shape == (24, 3) and uvw.dtype == np.float32
+  np.testing.assert_allclose(uvw[0], [1 / 8, 1 / 6, 1 / 4])
+  np.testing.assert_allclose(uvw[-1], [7 / 8, 5 / 6, 3 / 4])
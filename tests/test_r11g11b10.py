@@ -0,0 +1,62 @@
+"""Exhaustive checks of the FloatR11G11B10 lookup-table decoder and its encoder."""
+import numpy as np
+import pytest
+
+from texture_sampler import _decode_r11g11b10_uint_to_float_rgb, _encode_float_rgb_to_r11g11b10_uint
+
+
+# (channel, shift in the packed word, mantissa bits)
+COMPONENTS = [(0, 0, 6), (1, 11, 6), (2, 22, 5)]
+
+
+def _reference_component(bits: np.ndarray, mantissa_bits: int) -> np.ndarray:
+  # The per-component formula the decoder used before the lookup tables, except that
+  # exp == 31 now decodes to the largest half float (it used to be 65536)
+  exp_bits = bits >> mantissa_bits
+  mant_bits = bits & ((1 << mantissa_bits) - 1)
+  value = np.zeros_like(bits, dtype=np.float32)
+  subnormal = exp_bits == 0
+  normal = (exp_bits > 0) & (exp_bits < 31)
+  value[subnormal] = (2.0 ** -14) * (mant_bits[subnormal].astype(np.float32) / (2 ** mantissa_bits))
+  value[normal] = (1.0 + mant_bits[normal].astype(np.float32) / (2 ** mantissa_bits)) * (
+    2.0 ** (exp_bits[normal].astype(np.int32) - 15)
+  )
+  value[exp_bits == 31] = np.finfo(np.float16).max
+  return value
+
+
+def _patterns(mantissa_bits: int) -> np.ndarray:
+  return np.arange(1 << (5 + mantissa_bits), dtype=np.uint32)
+
+
+@pytest.mark.parametrize("channel,shift,mantissa_bits", COMPONENTS)
+def test_decoder_matches_reference_formula(channel, shift, mantissa_bits):
+  bits = _patterns(mantissa_bits)
+  decoded = _decode_r11g11b10_uint_to_float_rgb(bits << np.uint32(shift))
+  np.testing.assert_array_equal(decoded[:, channel], _reference_component(bits, mantissa_bits))
+  assert decoded.dtype == np.float32
+
+
+@pytest.mark.parametrize("channel,shift,mantissa_bits", COMPONENTS)
+def test_encode_decode_round_trip(channel, shift, mantissa_bits):
+  bits = _patterns(mantissa_bits)
+  finite = bits[(bits >> mantissa_bits) < 31]
+  rgb = np.zeros((finite.size, 3), dtype=np.float32)
+  rgb[:, channel] = _decode_r11g11b10_uint_to_float_rgb(finite << np.uint32(shift))[:, channel]
+  np.testing.assert_array_equal(_encode_float_rgb_to_r11g11b10_uint(rgb), finite << np.uint32(shift))
+
+
+@pytest.mark.parametrize("channel,shift,mantissa_bits", COMPONENTS)
+def test_midpoints_round_to_even(channel, shift, mantissa_bits):
+  bits = _patterns(mantissa_bits)
+  finite = bits[(bits >> mantissa_bits) < 31]
+  values = _decode_r11g11b10_uint_to_float_rgb(finite << np.uint32(shift))[:, channel].astype(np.float64)
+  # Every midpoint between neighbouring encodings needs one more mantissa bit, so it is exact in float32
+  midpoints = ((values[:-1] + values[1:]) / 2).astype(np.float32)
+  assert np.array_equal(midpoints.astype(np.float64), (values[:-1] + values[1:]) / 2)
+
+  rgb = np.zeros((midpoints.size, 3), dtype=np.float32)
+  rgb[:, channel] = midpoints
+  encoded = _encode_float_rgb_to_r11g11b10_uint(rgb) >> np.uint32(shift)
+  lower, upper = finite[:-1], finite[1:]
+  np.testing.assert_array_equal(encoded, np.where(lower % 2 == 0, lower, upper))
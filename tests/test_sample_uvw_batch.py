@@ -0,0 +1,37 @@
+"""`sample_uvw_batch` against the per-point `sample_uv` path."""
+import numpy as np
+import pytest
+
+from benchmark import write_synthetic_texture
+from texture_sampler import load_texture, sample_uv, sample_uvw_batch
+
+
+def _uvw(dtype) -> np.ndarray:
+  rng = np.random.default_rng(0)
+  inside = rng.random((200, 3))
+  # Texel centers and edges of a (3, 4, 5) grid, the [0, 1] bounds and out-of-range values
+  special = np.array([
+    [0.0, 0.0, 0.0], [1.0, 1.0, 1.0], [0.1, 0.125, 1 / 6], [0.5, 0.5, 0.5], [0.9, 0.875, 5 / 6],
+    [-0.5, 1.5, 0.5], [2.0, -1.0, 0.0], [0.2, 0.25, 1 / 3], [1e-9, 1 - 1e-9, 0.5],
+  ])
+  return np.concatenate([inside, special]).astype(dtype)
+
+
+@pytest.mark.parametrize("pixel_format, mmap", [
+  ("A32B32G32R32F", False),
+  ("A32B32G32R32F", True), # memory-mapped raw texels
+  ("FloatR11G11B10", False),
+  ("FloatR11G11B10", True), # lazily decoded
+  ("R8G8B8A8", True),
+  ("FloatRGBA", False),
+])
+@pytest.mark.parametrize("method", ["trilinear", "nearest"])
+@pytest.mark.parametrize("uvw_dtype", [np.float32, np.float64])
+def test_batch_matches_per_point(tmp_path, pixel_format, mmap, method, uvw_dtype):
+  bin_path = write_synthetic_texture(tmp_path, "tex", pixel_format, (3, 4, 5), np.random.default_rng(1))
+  tex = load_texture(bin_path, mmap=mmap)
+  uvw = _uvw(uvw_dtype)
+  expected = np.stack([sample_uv(tex, u, v, w, method=method) for u, v, w in uvw])
+  batch = sample_uvw_batch(tex, uvw, method=method)
+  assert batch.dtype == expected.dtype
+  np.testing.assert_array_equal(batch, expected)
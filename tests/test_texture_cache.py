@@ -0,0 +1,90 @@
+"""LRU texture cache: eviction order, byte budget, invalidation and stats."""
+import os
+
+import numpy as np
+
+from benchmark import write_synthetic_texture
+from texture_sampler import TextureCache
+
+SHAPE = (2, 4, 8) # 64 texels; 1 KiB as decoded A32B32G32R32F
+NBYTES = 2 * 4 * 8 * 4 * 4
+
+
+def _write(tmp_path, names, seed=0):
+  rng = np.random.default_rng(seed)
+  return [write_synthetic_texture(tmp_path, name, "A32B32G32R32F", SHAPE, rng) for name in names]
+
+
+def test_lru_eviction_order_and_budget(tmp_path):
+  a, b, c = _write(tmp_path, "abc")
+  cache = TextureCache(max_bytes=2 * NBYTES)
+  cache.load(a)
+  cache.load(b)
+  cache.load(a) # a is now the most recently used
+  cache.load(c) # evicts b
+  stats = cache.stats()
+  assert (stats.hits, stats.misses, stats.evictions, stats.entries, stats.bytes) == (1, 3, 1, 2, 2 * NBYTES)
+
+  cache.load(a)
+  cache.load(c)
+  assert cache.stats().hits == 3
+  cache.load(b)
+  assert cache.stats().misses == 4 and cache.stats().evictions == 2
+
+  cache.set_budget(NBYTES)
+  assert cache.stats().entries == 1 and cache.stats().bytes == NBYTES
+
+
+def test_texture_over_budget_is_not_cached(tmp_path):
+  (a,) = _write(tmp_path, "a")
+  cache = TextureCache(max_bytes=NBYTES - 1)
+  cache.load(a)
+  assert cache.stats().entries == 0 and cache.stats().bytes == 0
+
+
+def test_reload_on_mtime_or_size_change(tmp_path):
+  (a,) = _write(tmp_path, "a")
+  cache = TextureCache()
+  first = cache.load(a)
+
+  # Same size, new contents and mtime
+  _write(tmp_path, "a", seed=1)
+  st = a.stat()
+  os.utime(a, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+  second = cache.load(a)
+  assert not np.array_equal(first.data, second.data)
+  assert cache.stats().misses == 2 and cache.stats().entries == 1
+
+  # New size (trailing padding beyond TotalBytes), same mtime
+  mtime = a.stat().st_mtime_ns
+  with open(a, "ab") as f:
+    f.write(b"\0" * 16)
+  os.utime(a, ns=(mtime, mtime))
+  cache.load(a)
+  assert cache.stats().misses == 3 and cache.stats().entries == 1
+
+
+def test_invalidate_and_clear(tmp_path):
+  a, b = _write(tmp_path, "ab")
+  cache = TextureCache()
+  cache.load(a)
+  cache.load(b)
+  cache.invalidate(a)
+  assert cache.stats().entries == 1 and cache.stats().bytes == NBYTES
+  cache.clear()
+  stats = cache.stats()
+  assert (stats.entries, stats.bytes, stats.misses) == (0, 0, 2)
+  cache.reset_stats()
+  assert cache.stats().misses == 0
+
+
+def test_mmap_entries_are_free(tmp_path):
+  a, b, c = _write(tmp_path, "abc")
+  cache = TextureCache(max_bytes=NBYTES)
+  cache.load(a)
+  cache.load(b, mmap=True)
+  cache.load(c, mmap=True)
+  stats = cache.stats()
+  assert (stats.entries, stats.bytes, stats.evictions) == (3, NBYTES, 0)
+  cache.load(a)
+  assert cache.stats().hits == 1
@@ -0,0 +1,26 @@
+"""Writing textures and SH volumes back out as .bin/.json pairs."""
+import numpy as np
+import pytest
+
+from benchmark import write_synthetic_bake
+from sh_volume import SHVolume
+from texture_sampler import load_texture
+from texture_writer import _PIXEL_ENCODERS, quantize, write_sh_volume, write_texture
+
+
+@pytest.mark.parametrize("pixel_format", sorted(_PIXEL_ENCODERS))
+def test_write_texture_round_trip(tmp_path, pixel_format):
+  channels = _PIXEL_ENCODERS[pixel_format].channels
+  data = np.random.default_rng(0).random((2, 4, 6, channels), dtype=np.float32)
+  write_texture(data, tmp_path / "tex.bin", pixel_format)
+  np.testing.assert_array_equal(load_texture(tmp_path / "tex.bin").data, quantize(data, pixel_format))
+
+
+def test_write_sh_volume_into_its_source(tmp_path):
+  write_synthetic_bake(tmp_path, (2, 4, 6), np.random.default_rng(0))
+  (tmp_path / "IndirectionTexture.bin").write_bytes(b"\0" * 16)
+  (tmp_path / "IndirectionTexture.json").write_text("{}", encoding="utf-8")
+  sh = np.array(SHVolume.load(tmp_path).data)
+  write_sh_volume(sh, tmp_path, copy_from=tmp_path)
+  np.testing.assert_array_equal(SHVolume.load(tmp_path).data, sh)
+  assert (tmp_path / "IndirectionTexture.bin").read_bytes() == b"\0" * 16
@@ -0,0 +1,41 @@
+"""Brick atlas UVs of the volumetric lightmap against hand-computed ComputeVolumetricLightmapBrickTextureUVs."""
+import numpy as np
+import pytest
+
+from constants import SH_FLOAT_COUNT
+from sh_volume import SHVolume
+from texture_sampler import TextureMetadata
+from volumetric_lightmap import VolumetricLightmap
+
+
+def _lightmap() -> VolumetricLightmap:
+  # 4x4x4 indirection cells over an atlas of three padded 4^3 bricks along x (15x5x5 texels):
+  # brick 0 (w = 2) covers cells [0, 2)^3, brick 2 cell (3, 3, 3), brick 1 every other cell
+  indirection = np.zeros((4, 4, 4, 4), dtype=np.uint8)
+  indirection[...] = (1, 0, 0, 1)
+  indirection[:2, :2, :2] = (0, 0, 0, 2)
+  indirection[3, 3, 3] = (2, 0, 0, 1)
+  meta = TextureMetadata(width=15, height=5, depth=5, pixel_format="SH3_FLOAT", bytes_per_pixel=4 * SH_FLOAT_COUNT, total_bytes=0)
+  sh = SHVolume(meta, np.zeros((5, 5, 15, SH_FLOAT_COUNT), dtype=np.float32))
+  return VolumetricLightmap(indirection, sh, np.ones(3, dtype=np.float32), np.zeros(3, dtype=np.float32))
+
+
+def test_brick_uvs():
+  # (BrickOffset * 5 + frac(TexelCoordinate / w) * 4 + 0.5) / (15, 5, 5)
+  cases = [
+    ((0.3, 0.1, 0.2), (2.9 / 15, 1.3 / 5, 2.1 / 5)), # texel (1.2, 0.4, 0.8), brick 0
+    ((0.45, 0.45, 0.45), (4.1 / 15, 4.1 / 5, 4.1 / 5)), # texel (1.8, 1.8, 1.8), brick 0
+    ((0.6, 0.1, 0.2), (7.1 / 15, 2.1 / 5, 3.7 / 5)), # texel (2.4, 0.4, 0.8), brick 1
+    ((0.9, 0.95, 0.8), (12.9 / 15, 3.7 / 5, 1.3 / 5)), # texel (3.6, 3.8, 3.2), brick 2
+    ((1.5, -1.0, 0.2), (9.34 / 15, 0.5 / 5, 3.7 / 5)), # clamped to (0.99, 0, 0.2), brick 1
+  ]
+  positions, expected = (np.array(x, dtype=np.float64) for x in zip(*cases))
+  np.testing.assert_allclose(_lightmap().brick_uvs(positions), expected, rtol=1e-5)
+
+
+def test_unmapped_cell_raises():
+  lightmap = _lightmap()
+  lightmap.indirection[2, 1, 3, 3] = 0
+  lightmap.brick_uvs([(0.1, 0.1, 0.1)])
+  with pytest.raises(ValueError, match=r"cell \(x=3, y=1, z=2\)"):
+    lightmap.brick_uvs([(0.1, 0.1, 0.1), (0.8, 0.3, 0.6)])
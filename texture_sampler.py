@@ -1,12 +1,17 @@
 import json
 import math
+import threading
+from collections import OrderedDict
 from functools import cache
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Callable, Dict, Optional, Tuple
 
 import numpy as np
 
+from bc6h import decode_bc6h_blocks
+from formats import FPixelFormatInfo, GPixelFormats
+
 
 @dataclass
 class TextureMetadata:
@@ -21,7 +26,7 @@ class TextureMetadata:
 @dataclass
 class Texture:
   meta: TextureMetadata
-  data: np.ndarray # stored as (Depth, Height, Width, Channels)
+  data: np.ndarray # stored as (Depth, Height, Width, Channels); a LazyTextureData for mmap-loaded packed formats
 
 
 def _read_metadata(json_path: Path) -> TextureMetadata:
@@ -37,6 +42,36 @@ def _read_metadata(json_path: Path) -> TextureMetadata:
   )
 
 
+# FloatR11G11B10 components are unsigned small floats with a 5-bit exponent (bias 15):
+# R and G have a 6-bit mantissa, B has a 5-bit mantissa.
+_SMALL_FLOAT_EXP_BIAS = 15
+_SMALL_FLOAT_MIN_NORMAL = 2.0 ** (1 - _SMALL_FLOAT_EXP_BIAS)
+_SMALL_FLOAT_SPECIAL = float(np.finfo(np.float16).max) # exp == 31
+
+
+def _small_float_lut(mantissa_bits: int) -> np.ndarray:
+  """Decoded float32 value for every bit pattern of an unsigned small float."""
+  bits = np.arange(1 << (5 + mantissa_bits), dtype=np.uint32)
+  exp_bits = bits >> mantissa_bits
+  mant = (bits & ((1 << mantissa_bits) - 1)).astype(np.float64) / (1 << mantissa_bits)
+
+  # Subnormal: exp == 0 -> value = 2^(-14) * mantissa / 2^mantissa_bits
+  lut = np.where(
+    exp_bits == 0,
+    _SMALL_FLOAT_MIN_NORMAL * mant,
+    (1.0 + mant) * np.exp2(exp_bits.astype(np.float64) - _SMALL_FLOAT_EXP_BIAS),
+  )
+  # exp == 31 (all ones) is Inf/NaN in DXGI; content should never contain it,
+  # so it decodes to a plausible large finite value instead. The largest half float
+  # keeps the value identical in the float32 and the native float16 paths.
+  lut[exp_bits == 31] = _SMALL_FLOAT_SPECIAL
+  return lut.astype(np.float32)
+
+
+_R11_LUT = _small_float_lut(mantissa_bits=6)  # 2048 entries
+_B10_LUT = _small_float_lut(mantissa_bits=5)  # 1024 entries
+
+
 def _decode_r11g11b10_uint_to_float_rgb(packed: np.ndarray) -> np.ndarray:
   """Decode DXGI_R11G11B10_FLOAT (aka FloatR11G11B10) to float32 RGB.
 
@@ -47,42 +82,49 @@ def _decode_r11g11b10_uint_to_float_rgb(packed: np.ndarray) -> np.ndarray:
   # R: bits [0..10]  -> 11-bit float (5-bit exponent, 6-bit mantissa)
   # G: bits [11..21] -> 11-bit float (5-bit exponent, 6-bit mantissa)
   # B: bits [22..31] -> 10-bit float (5-bit exponent, 5-bit mantissa)
-  r_bits = (packed >> 0) & np.uint32(0x7FF)   # 11 bits
-  g_bits = (packed >> 11) & np.uint32(0x7FF)  # 11 bits
-  b_bits = (packed >> 22) & np.uint32(0x3FF)  # 10 bits
-
-  def _decode_component(bits: np.ndarray, mantissa_bits: int) -> np.ndarray:
-    exp_bits = bits >> mantissa_bits
-    mant_bits = bits & ((1 << mantissa_bits) - 1)
-    bias = 15
-
-    # Subnormal: exp == 0 -> value = 2^(-14) * mantissa / 2^mantissa_bits
-    subnormal = exp_bits == 0
-    normal = (exp_bits > 0) & (exp_bits < 31)
-
-    value = np.zeros_like(bits, dtype=np.float32)
-    if np.any(subnormal):
-      value[subnormal] = (2.0 ** -14) * (mant_bits[subnormal].astype(np.float32) / (2 ** mantissa_bits))
-    if np.any(normal):
-      value[normal] = (1.0 + mant_bits[normal].astype(np.float32) / (2 ** mantissa_bits)) * (
-        2.0 ** (exp_bits[normal].astype(np.int32) - bias)
-      )
-    # exp == 31 (all ones): treat as large value; clamp to finite max representable approx.
-    # Using the largest finite value for this limited-precision float representation.
-    special = exp_bits == 31
-    if np.any(special):
-      # Max finite for 11-bit mantissa (~2^(16) * (1 + 63/64)) and for 10-bit (~2^(16) * (1 + 31/32)).
-      # This branch should be rare in content; set to a plausible large number.
-      max_finite = np.float32(65536.0)
-      value[special] = max_finite
-    return value
-
-  r = _decode_component(r_bits, mantissa_bits=6)
-  g = _decode_component(g_bits, mantissa_bits=6)
-  b = _decode_component(b_bits, mantissa_bits=5)
+  packed = np.asarray(packed, dtype=np.uint32)
+  r = _R11_LUT.take(packed & np.uint32(0x7FF))
+  g = _R11_LUT.take((packed >> 11) & np.uint32(0x7FF))
+  b = _B10_LUT.take(packed >> 22)
   return np.stack([r, g, b], axis=-1)
 
 
+def _encode_small_float(x: np.ndarray, mantissa_bits: int) -> np.ndarray:
+  """Encode float32 values as unsigned small floats, rounding to nearest even.
+
+  Negative values and NaN encode to 0, values above the largest finite small float clamp to it.
+  """
+  max_finite = (2.0 - 2.0 ** -mantissa_bits) * 2.0 ** (30 - _SMALL_FLOAT_EXP_BIAS)
+  x = np.nan_to_num(np.asarray(x, dtype=np.float32), nan=0.0, posinf=max_finite, neginf=0.0)
+  x = np.clip(x, np.float32(0.0), np.float32(max_finite))
+
+  # Normal range: re-bias the float32 exponent (127 -> 15) and round the mantissa,
+  # letting a mantissa carry propagate into the exponent.
+  shift = 23 - mantissa_bits
+  normal = x.view(np.uint32) - np.uint32((127 - _SMALL_FLOAT_EXP_BIAS) << 23)
+  normal = (normal + np.uint32((1 << (shift - 1)) - 1) + ((normal >> shift) & np.uint32(1))) >> shift
+
+  # Subnormal range: one ulp is 2^-14 / 2^mantissa_bits. Rounding up to 2^mantissa_bits
+  # yields exactly the encoding of the smallest normal.
+  subnormal = np.minimum(x, np.float32(_SMALL_FLOAT_MIN_NORMAL)).astype(np.float64)
+  subnormal = np.rint(subnormal * 2.0 ** (_SMALL_FLOAT_EXP_BIAS - 1 + mantissa_bits)).astype(np.uint32)
+
+  return np.where(x < np.float32(_SMALL_FLOAT_MIN_NORMAL), subnormal, normal)
+
+
+def _encode_float_rgb_to_r11g11b10_uint(rgb: np.ndarray) -> np.ndarray:
+  """Encode float RGB to DXGI_R11G11B10_FLOAT (aka FloatR11G11B10), inverse of the decoder.
+
+  rgb: np.ndarray of shape (..., 3)
+  returns uint32 array of shape (...,)
+  """
+  rgb = np.asarray(rgb)
+  r = _encode_small_float(rgb[..., 0], mantissa_bits=6)
+  g = _encode_small_float(rgb[..., 1], mantissa_bits=6)
+  b = _encode_small_float(rgb[..., 2], mantissa_bits=5)
+  return r | (g << np.uint32(11)) | (b << np.uint32(22))
+
+
 def _reshape_tex(flat: np.ndarray, meta: TextureMetadata, channels: int) -> np.ndarray:
   # Assume X (width) is fastest-varying, then Y (height), then Z (depth)
   # so the memory order is: for z in [0..D-1], for y in [0..H-1], for x in [0..W-1]
@@ -92,12 +134,255 @@ def _reshape_tex(flat: np.ndarray, meta: TextureMetadata, channels: int) -> np.n
   return flat.reshape((meta.depth, meta.height, meta.width, channels))
 
 
-def load_texture(bin_path: str | Path, json_path: Optional[str | Path] = None) -> Texture:
+class LazyTextureData:
+  """Read-only (D, H, W, C) view over an encoded texture that decodes on access.
+
+  Indexing decodes only the texels that were selected, so `data[z]` decodes a single
+  depth slice and the gathers done by the samplers decode only the fetched corners.
+  `np.asarray(data)` decodes the whole volume one depth slice at a time.
+  """
+
+  def __init__(self, raw: np.ndarray, decode: Callable[[np.ndarray], np.ndarray], channels: int, dtype=np.float32):
+    self.raw = raw # encoded texels, (D, H, W, K)
+    self.decode = decode
+    self.shape = tuple(raw.shape[:3]) + (channels,)
+    self.dtype = np.dtype(dtype)
+    self.ndim = 4
+
+  @property
+  def nbytes(self) -> int:
+    return self.raw.nbytes
+
+  def __len__(self) -> int:
+    return self.shape[0]
+
+  def __getitem__(self, key):
+    if not isinstance(key, tuple):
+      key = (key,)
+    if any(k is Ellipsis or k is None for k in key):
+      return np.asarray(self)[key]
+    spatial, channel = key[:3], key[3:]
+    texels = self.decode(np.asarray(self.raw[spatial]))
+    if channel:
+      texels = texels[(Ellipsis,) + channel]
+    return texels
+
+  def __iter__(self):
+    for z in range(self.shape[0]):
+      yield self[z]
+
+  def __array__(self, dtype=None, copy=None):
+    out = np.empty(self.shape, dtype=self.dtype)
+    for z in range(self.shape[0]):
+      out[z] = self[z]
+    if dtype is not None:
+      out = out.astype(dtype, copy=False)
+    return out
+
+
+class LazyBlockTextureData(LazyTextureData):
+  """`LazyTextureData` for block-compressed formats.
+
+  raw is (D, BlocksY, BlocksX, K); `decode` returns (..., BlockSizeY, BlockSizeX, C) tiles.
+  Point lookups decode only the blocks that contain the requested texels, anything else
+  decodes the selected depth slices.
+  """
+
+  def __init__(self, raw: np.ndarray, decode: Callable[[np.ndarray], np.ndarray], channels: int,
+               block_size: Tuple[int, int], extent: Tuple[int, int], dtype=np.float32):
+    super().__init__(raw, decode, channels, dtype)
+    self.block_size = block_size
+    self.shape = (raw.shape[0],) + tuple(extent) + (channels,)
+
+  def __getitem__(self, key):
+    if not isinstance(key, tuple):
+      key = (key,)
+    if any(k is Ellipsis or k is None for k in key):
+      return np.asarray(self)[key]
+    spatial, channel = key[:3], key[3:]
+
+    if len(spatial) == 3 and not any(isinstance(k, slice) for k in spatial):
+      z, y, x = (np.asarray(k) for k in spatial)
+      by, bx = self.block_size
+      tiles = self.decode(np.asarray(self.raw[z, y // by, x // bx]))
+      lead = tiles.shape[:-3]
+      texel = np.broadcast_to((y % by) * bx + (x % bx), lead).reshape(-1)
+      tiles = tiles.reshape((-1, by * bx, self.shape[-1]))
+      texels = tiles[np.arange(tiles.shape[0]), texel].reshape(lead + (self.shape[-1],))
+    else:
+      tiles = self.decode(np.asarray(self.raw[spatial[0]]))
+      texels = _untile(tiles, self.shape[1:3])
+      lead = (slice(None),) * (texels.ndim - 3)
+      texels = texels[lead + spatial[1:]]
+
+    if channel:
+      texels = texels[(Ellipsis,) + channel]
+    return texels
+
+
+def _untile(tiles: np.ndarray, extent: Tuple[int, int]) -> np.ndarray:
+  # (..., BlocksY, BlocksX, BlockSizeY, BlockSizeX, C) -> (..., Height, Width, C)
+  *lead, blocks_y, blocks_x, by, bx, channels = tiles.shape
+  texels = np.swapaxes(tiles, -4, -3).reshape(tuple(lead) + (blocks_y * by, blocks_x * bx, channels))
+  return texels[..., : extent[0], : extent[1], :]
+
+
+@dataclass(frozen=True)
+class PixelDecoder:
+  """How the bytes of a pixel format turn into texels.
+
+  - raw_dtype / raw_count: the .bin is reinterpreted (without copying) as `raw_count`
+    elements of `raw_dtype` per pixel, or per block for block-compressed formats.
+  - decode: raw (..., raw_count) -> float32 (..., channels). None if the raw view already is float32.
+    Block-compressed formats return (..., BlockSizeY, BlockSizeX, channels) tiles instead.
+  - native: raw -> texels in the format's compact dtype (`native_dtype`). None if the raw view
+    already is that representation.
+  """
+  raw_dtype: type
+  raw_count: int
+  channels: int
+  decode: Optional[Callable[[np.ndarray], np.ndarray]]
+  native: Optional[Callable[[np.ndarray], np.ndarray]] = None
+  native_dtype: type = np.float32
+
+
+_PIXEL_DECODERS: Dict[str, PixelDecoder] = {}
+
+
+def _format_key(pixel_format: str) -> str:
+  key = pixel_format.upper()
+  return key[3:] if key.startswith("PF_") else key
+
+
+@cache
+def _pixel_format_infos() -> Dict[str, FPixelFormatInfo]:
+  infos = {}
+  for info in GPixelFormats:
+    infos.setdefault(_format_key(info.Name), info)
+    infos.setdefault(_format_key(info.UnrealFormat.name), info)
+  return infos
+
+
+def pixel_format_info(pixel_format: str) -> FPixelFormatInfo:
+  """Look up the `formats.GPixelFormats` entry for a metadata PixelFormat string."""
+  info = _pixel_format_infos().get(_format_key(pixel_format))
+  if info is None:
+    raise NotImplementedError(f"Unknown PixelFormat: {pixel_format}")
+  return info
+
+
+def register_pixel_decoder(pixel_format: str, decoder: PixelDecoder) -> None:
+  """Register (or replace) the decoder used by `load_texture` for a pixel format."""
+  info = pixel_format_info(pixel_format)
+  if decoder.channels != info.NumComponents:
+    raise ValueError(f"{info.Name} has {info.NumComponents} components, decoder produces {decoder.channels}")
+  _PIXEL_DECODERS[_format_key(pixel_format)] = decoder
+
+
+def pixel_decoder(pixel_format: str) -> PixelDecoder:
+  """The decoder `load_texture` uses for a metadata PixelFormat string."""
+  decoder = _PIXEL_DECODERS.get(_format_key(pixel_format))
+  if decoder is None:
+    raise NotImplementedError(f"Unsupported PixelFormat: {pixel_format}")
+  return decoder
+
+
+def _decode_unorm8(raw: np.ndarray) -> np.ndarray:
+  return raw.astype(np.float32) / 255.0
+
+
+def _bgra_to_rgba(raw: np.ndarray) -> np.ndarray:
+  return raw[..., [2, 1, 0, 3]]
+
+
+def _decode_half(raw: np.ndarray) -> np.ndarray:
+  return raw.astype(np.float32)
+
+
+def _a2b10g10r10_codes(raw: np.ndarray) -> np.ndarray:
+  # DXGI_R10G10B10A2_UNORM: R bits [0..9], G [10..19], B [20..29], A [30..31]
+  packed = raw[..., 0]
+  return np.stack([(packed >> shift) & np.uint32(0x3FF) for shift in (0, 10, 20, 30)], axis=-1).astype(np.uint16)
+
+
+def _decode_a2b10g10r10(raw: np.ndarray) -> np.ndarray:
+  codes = _a2b10g10r10_codes(raw).astype(np.float32)
+  return codes / np.array([1023.0, 1023.0, 1023.0, 3.0], dtype=np.float32)
+
+
+_R11G11B10_LUT16 = (_R11_LUT.astype(np.float16), _B10_LUT.astype(np.float16))
+
+
+def _r11g11b10_to_half(raw: np.ndarray) -> np.ndarray:
+  # Every finite 11/10-bit float is exactly representable as a half float
+  packed = raw[..., 0]
+  r11, b10 = _R11G11B10_LUT16
+  return np.stack([
+    r11.take(packed & np.uint32(0x7FF)),
+    r11.take((packed >> 11) & np.uint32(0x7FF)),
+    b10.take(packed >> 22),
+  ], axis=-1)
+
+
+def _decode_bc6h(raw: np.ndarray) -> np.ndarray:
+  return decode_bc6h_blocks(raw).astype(np.float32)
+
+
+_UNORM8 = dict(raw_dtype=np.uint8, decode=_decode_unorm8, native_dtype=np.uint8)
+_HALF = dict(raw_dtype=np.float16, decode=_decode_half, native_dtype=np.float16)
+
+for _names, _decoder in [
+  (("R8G8B8A8", "R8G8B8A8_UINT"), PixelDecoder(raw_count=4, channels=4, **_UNORM8)),
+  (("R8", "G8"), PixelDecoder(raw_count=1, channels=1, **_UNORM8)),
+  (("B8G8R8A8",), PixelDecoder(np.uint8, 4, 4, lambda raw: _decode_unorm8(_bgra_to_rgba(raw)), _bgra_to_rgba, np.uint8)),
+  (("R32_FLOAT",), PixelDecoder(np.float32, 1, 1, None)),
+  (("G32R32F",), PixelDecoder(np.float32, 2, 2, None)),
+  (("R32G32B32F",), PixelDecoder(np.float32, 3, 3, None)),
+  (("A32B32G32R32F",), PixelDecoder(np.float32, 4, 4, None)),
+  (("R16F", "R16F_FILTER"), PixelDecoder(raw_count=1, channels=1, **_HALF)),
+  (("G16R16F", "G16R16F_FILTER"), PixelDecoder(raw_count=2, channels=2, **_HALF)),
+  (("FloatRGBA",), PixelDecoder(raw_count=4, channels=4, **_HALF)),
+  (("A2B10G10R10",), PixelDecoder(np.uint32, 1, 4, _decode_a2b10g10r10, _a2b10g10r10_codes, np.uint16)),
+  (("FloatR11G11B10", "FloatRGB"), PixelDecoder(
+    np.uint32, 1, 3, lambda raw: _decode_r11g11b10_uint_to_float_rgb(raw[..., 0]), _r11g11b10_to_half, np.float16)),
+  (("BC6H",), PixelDecoder(np.uint8, 16, 3, _decode_bc6h, decode_bc6h_blocks, np.float16)),
+]:
+  for _name in _names:
+    register_pixel_decoder(_name, _decoder)
+
+
+def _read_raw(bin_p: Path, meta: TextureMetadata, mmap: bool) -> np.ndarray:
+  if mmap:
+    raw = np.memmap(bin_p, dtype=np.uint8, mode="r")
+  else:
+    raw = np.fromfile(bin_p, dtype=np.uint8)
+  if raw.nbytes != meta.total_bytes:
+    # Allow if file is larger due to alignment, but still matches leading expected size
+    if raw.nbytes < meta.total_bytes:
+      raise ValueError(f"Binary size {raw.nbytes} < metadata TotalBytes {meta.total_bytes}")
+    raw = raw[: meta.total_bytes]
+  return raw
+
+
+def load_texture(
+  bin_path: str | Path,
+  json_path: Optional[str | Path] = None,
+  mmap: bool = False,
+  native: bool = False,
+) -> Texture:
   """Load a texture from .bin and .json metadata.
 
-  - Supports PixelFormat: "R8G8B8A8", "R8G8B8A8_UINT", "R8", "R32_FLOAT", "FloatR11G11B10".
+  - Supports every PixelFormat with a registered `PixelDecoder`: 8-bit UNORM (R8G8B8A8, B8G8R8A8, R8, G8),
+    32-bit float (R32_FLOAT, G32R32F, R32G32B32F, A32B32G32R32F), half float (R16F, G16R16F, FloatRGBA),
+    A2B10G10R10, FloatR11G11B10 and BC6H.
   - Returns data as float32 in range [0,1] for UNORM formats, float32 for float formats.
   - Data layout: (D, H, W, C)
+  - native=True keeps the format's compact dtype instead: float16 for half-float formats,
+    FloatR11G11B10 and BC6H, raw uint8 codes (0..255, not normalized) for 8-bit UNORM formats,
+    raw uint16 codes (RGB 0..1023, A 0..3) for A2B10G10R10.
+  - mmap=True memory-maps the .bin instead of reading it. Formats whose texels need no decoding
+    are then a direct read-only view of the file; other formats are exposed as a
+    `LazyTextureData` that decodes on access.
   """
   bin_p = Path(bin_path)
   if json_path is None:
@@ -107,45 +392,178 @@ def load_texture(bin_path: str | Path, json_path: Optional[str | Path] = None) -
 
   meta = _read_metadata(json_p)
 
+  info = pixel_format_info(meta.pixel_format)
+  decoder = pixel_decoder(meta.pixel_format)
+
+  block_size = (info.BlockSizeY, info.BlockSizeX)
+  is_block = info.BlockSizeX * info.BlockSizeY * info.BlockSizeZ > 1
+  if not is_block and meta.bytes_per_pixel != info.BlockBytes:
+    raise ValueError(f"{info.Name} must have {info.BlockBytes} BytesPerPixel")
+  blocks = (
+    meta.depth // info.BlockSizeZ,
+    -(-meta.height // info.BlockSizeY),
+    -(-meta.width // info.BlockSizeX),
+  )
+  expected_bytes = math.prod(blocks) * info.BlockBytes
+  if meta.total_bytes < expected_bytes:
+    raise ValueError(f"TotalBytes {meta.total_bytes} < {expected_bytes} required by {info.Name} {meta.width}x{meta.height}x{meta.depth}")
+
   # Read raw bytes
-  raw = np.fromfile(bin_p, dtype=np.uint8)
-  if raw.nbytes != meta.total_bytes:
-    # Allow if file is larger due to alignment, but still matches leading expected size
-    if raw.nbytes < meta.total_bytes:
-      raise ValueError(f"Binary size {raw.nbytes} < metadata TotalBytes {meta.total_bytes}")
-    raw = raw[: meta.total_bytes]
+  raw = _read_raw(bin_p, meta, mmap)
 
-  pf = meta.pixel_format.upper()
-
-  if pf in ("R8G8B8A8", "R8G8B8A8_UINT"):
-    flat = raw.reshape((-1, 4)).astype(np.float32) / 255.0
-    data = _reshape_tex(flat, meta, channels=4)
-  elif pf == "R8":
-    flat = raw.astype(np.float32) / 255.0
-    data = _reshape_tex(flat[:, None], meta, channels=1)
-  elif pf == "R32_FLOAT":
-    if meta.bytes_per_pixel != 4:
-      raise ValueError("R32_FLOAT must have 4 BytesPerPixel")
-    flat = np.frombuffer(raw.tobytes(), dtype=np.float32).reshape((-1, 1))
-    data = _reshape_tex(flat, meta, channels=1)
-  elif pf == "FLOATR11G11B10":
-    if meta.bytes_per_pixel != 4:
-      raise ValueError("FloatR11G11B10 must have 4 BytesPerPixel")
-    flat_u32 = np.frombuffer(raw.tobytes(), dtype=np.uint32)
-    flat = _decode_r11g11b10_uint_to_float_rgb(flat_u32)
-    data = _reshape_tex(flat, meta, channels=3)
+  # Reinterpret the bytes in place (no copy)
+  if is_block:
+    encoded = raw[:expected_bytes].view(decoder.raw_dtype).reshape(blocks + (decoder.raw_count,))
   else:
-    raise NotImplementedError(f"Unsupported PixelFormat: {meta.pixel_format}")
+    flat = raw.view(decoder.raw_dtype).reshape((-1, decoder.raw_count))
+    encoded = _reshape_tex(flat, meta, channels=decoder.raw_count)
+
+  decode = decoder.native if native else decoder.decode
+  dtype = decoder.native_dtype if native else np.float32
+  if decode is None:
+    data = encoded
+  elif mmap and is_block:
+    data = LazyBlockTextureData(encoded, decode, decoder.channels, block_size, (meta.height, meta.width), dtype)
+  elif mmap:
+    data = LazyTextureData(encoded, decode, decoder.channels, dtype)
+  elif is_block:
+    data = _untile(decode(encoded), (meta.height, meta.width))
+  else:
+    data = decode(encoded)
+
+  return Texture(meta=meta, data=data)
+
+
+@dataclass
+class CacheStats:
+  hits: int = 0
+  misses: int = 0
+  evictions: int = 0
+  entries: int = 0
+  bytes: int = 0
 
-  return Texture(meta=meta, data=data.astype(np.float32, copy=False))
 
+class TextureCache:
+  """LRU cache of decoded textures under a byte budget.
 
+  Entries are keyed by (path, mtime, size, pixel format, mmap, native), so a re-baked file is
+  reloaded automatically. Cached arrays are made read-only and every lookup returns a
+  fresh `Texture` wrapper, so reassigning `tex.data` never affects the cache.
+
+  Memory-mapped entries (mmap=True) are charged 0 bytes: their pages belong to the OS
+  page cache, so they never evict eagerly loaded textures.
+  """
 
-def load_texture_by_name(tex_dir: str | Path, tex_name: str) -> Texture:
+  def __init__(self, max_bytes: int = 1 << 30):
+    self.max_bytes = max_bytes
+    self._entries: OrderedDict[tuple, Texture] = OrderedDict()
+    self._lock = threading.Lock()
+    self._stats = CacheStats()
+
+  @staticmethod
+  def _key(bin_p: Path, json_p: Path, mmap: bool, native: bool) -> tuple:
+    st = bin_p.stat()
+    meta = _read_metadata(json_p)
+    return (str(bin_p.resolve()), st.st_mtime_ns, st.st_size, meta.pixel_format, mmap, native)
+
+  @staticmethod
+  def _nbytes(key: tuple, tex: Texture) -> int:
+    mmap = key[4]
+    return 0 if mmap else int(tex.data.nbytes)
+
+  def load(
+    self,
+    bin_path: str | Path,
+    json_path: Optional[str | Path] = None,
+    mmap: bool = False,
+    native: bool = False,
+  ) -> Texture:
+    bin_p = Path(bin_path)
+    json_p = bin_p.with_suffix(".json") if json_path is None else Path(json_path)
+    key = self._key(bin_p, json_p, mmap, native)
+
+    with self._lock:
+      tex = self._entries.get(key)
+      if tex is not None:
+        self._entries.move_to_end(key)
+        self._stats.hits += 1
+        return Texture(meta=replace(tex.meta), data=tex.data)
+      self._stats.misses += 1
+
+    tex = load_texture(bin_p, json_p, mmap=mmap, native=native)
+    if isinstance(tex.data, np.ndarray):
+      tex.data.flags.writeable = False
+
+    with self._lock:
+      nbytes = self._nbytes(key, tex)
+      if nbytes <= self.max_bytes and key not in self._entries:
+        # Drop stale entries for the same file (it was re-baked since it was cached)
+        for stale in [k for k in self._entries if k[0] == key[0] and k[4:] == key[4:]]:
+          self._pop(stale)
+        self._entries[key] = tex
+        self._stats.bytes += nbytes
+        self._evict()
+    return Texture(meta=replace(tex.meta), data=tex.data)
+
+  def _pop(self, key: tuple) -> None:
+    tex = self._entries.pop(key)
+    self._stats.bytes -= self._nbytes(key, tex)
+
+  def _evict(self) -> None:
+    while self._stats.bytes > self.max_bytes and self._entries:
+      self._pop(next(iter(self._entries)))
+      self._stats.evictions += 1
+
+  def set_budget(self, max_bytes: int) -> None:
+    with self._lock:
+      self.max_bytes = max_bytes
+      self._evict()
+
+  def invalidate(self, bin_path: Optional[str | Path] = None) -> None:
+    """Drop every entry for `bin_path`, or the whole cache if no path is given."""
+    with self._lock:
+      if bin_path is None:
+        keys = list(self._entries)
+      else:
+        path = str(Path(bin_path).resolve())
+        keys = [k for k in self._entries if k[0] == path]
+      for key in keys:
+        self._pop(key)
+
+  def clear(self) -> None:
+    """Drop every entry; the hit/miss counters are kept."""
+    self.invalidate()
+
+  def stats(self) -> CacheStats:
+    with self._lock:
+      return replace(self._stats, entries=len(self._entries))
+
+  def reset_stats(self) -> None:
+    with self._lock:
+      self._stats = CacheStats(bytes=self._stats.bytes)
+
+
+_texture_cache = TextureCache()
+
+
+def get_texture_cache() -> TextureCache:
+  """Process-wide cache used by `load_texture_by_name`."""
+  return _texture_cache
+
+
+def load_texture_by_name(
+  tex_dir: str | Path,
+  tex_name: str,
+  mmap: bool = False,
+  native: bool = False,
+  cache: bool = True,
+) -> Texture:
   tex_path = Path(tex_dir) / tex_name
   bin_path = str(tex_path) + ".bin"
   json_path = str(tex_path) + ".json"
-  return load_texture(bin_path, json_path)
+  if cache:
+    return _texture_cache.load(bin_path, json_path, mmap=mmap, native=native)
+  return load_texture(bin_path, json_path, mmap=mmap, native=native)
 
 
 def _clamp(x, low, high) -> float:
@@ -212,6 +630,87 @@ def _sample_nearest(tex: Texture, u: float, v: float, w: float) -> np.ndarray:
 
   return c
 
+def _texel_coords(uvw: np.ndarray, size: int) -> np.ndarray:
+  # Same mapping as the scalar samplers, evaluated in the dtype of the input coordinates
+  return np.clip(uvw * size - 0.5, 0.0, float(size - 1))
+
+
+def _lerp_weights(t: np.ndarray, dtype: np.dtype) -> Tuple[np.ndarray, np.ndarray]:
+  # The scalar path multiplies texels by Python floats, which NumPy casts to the texel dtype
+  # before multiplying. Casting the weights up front keeps the batched result bit-identical.
+  return (1.0 - t).astype(dtype)[:, None], t.astype(dtype)[:, None]
+
+
+def _sample_trilinear_batch(tex: Texture, uvw: np.ndarray) -> np.ndarray:
+  depth, height, width, channels = tex.data.shape
+
+  x = _texel_coords(uvw[:, 0], width)
+  y = _texel_coords(uvw[:, 1], height)
+  z = _texel_coords(uvw[:, 2], depth)
+
+  x0 = np.floor(x).astype(np.intp)
+  y0 = np.floor(y).astype(np.intp)
+  z0 = np.floor(z).astype(np.intp)
+
+  x1 = np.minimum(x0 + 1, width - 1)
+  y1 = np.minimum(y0 + 1, height - 1)
+  z1 = np.minimum(z0 + 1, depth - 1)
+
+  tx = (x - x0.astype(x.dtype)).astype(np.float64)
+  ty = (y - y0.astype(y.dtype)).astype(np.float64)
+  tz = (z - z0.astype(z.dtype)).astype(np.float64)
+
+  dtype = np.result_type(tex.data.dtype, 1.0)
+  wx0, wx1 = _lerp_weights(tx, dtype)
+  wy0, wy1 = _lerp_weights(ty, dtype)
+  wz0, wz1 = _lerp_weights(tz, dtype)
+
+  data = tex.data
+  c00 = data[z0, y0, x0] * wx0 + data[z0, y0, x1] * wx1
+  c10 = data[z0, y1, x0] * wx0 + data[z0, y1, x1] * wx1
+  c01 = data[z1, y0, x0] * wx0 + data[z1, y0, x1] * wx1
+  c11 = data[z1, y1, x0] * wx0 + data[z1, y1, x1] * wx1
+
+  c0 = c00 * wy0 + c10 * wy1
+  c1 = c01 * wy0 + c11 * wy1
+
+  return c0 * wz0 + c1 * wz1
+
+
+def _sample_nearest_batch(tex: Texture, uvw: np.ndarray) -> np.ndarray:
+  depth, height, width, channels = tex.data.shape
+
+  # np.rint rounds half to even, exactly like Python's round()
+  nearest_x = np.rint(_texel_coords(uvw[:, 0], width)).astype(np.intp)
+  nearest_y = np.rint(_texel_coords(uvw[:, 1], height)).astype(np.intp)
+  nearest_z = np.rint(_texel_coords(uvw[:, 2], depth)).astype(np.intp)
+
+  return tex.data[nearest_z, nearest_y, nearest_x]
+
+
+def sample_uvw_batch(
+  tex: Texture,
+  uvw: np.ndarray,
+  method: str = "trilinear"
+) -> np.ndarray:
+  """Sample the texture at many UVW coordinates in [0,1] at once.
+
+  - uvw: array of shape (N, 3) (any shape with a trailing dimension of 3 is flattened).
+  - Returns an array of shape (N, C), bit-identical to calling `sample_uv` per point.
+  """
+  uvw = np.asarray(uvw)
+  if not np.issubdtype(uvw.dtype, np.floating):
+    uvw = uvw.astype(np.float64)
+  uvw = uvw.reshape(-1, 3)
+
+  if method == "trilinear":
+    return _sample_trilinear_batch(tex, uvw)
+  elif method == "nearest":
+    return _sample_nearest_batch(tex, uvw)
+  else:
+    raise ValueError(f"{method} not supported!")
+
+
 def sample_uv(
   tex: Texture,
   u: float,
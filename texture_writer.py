@@ -0,0 +1,275 @@
+"""Write textures back out as engine .bin/.json pairs, the inverse of `load_texture`.
+
+Every supported pixel format has a `PixelEncoder` that quantizes and packs float texels
+(as `load_texture` returns them) into the format's raw layout with whole-array operations.
+Volumes are written one depth slice at a time, into a plain file or a memory map, so
+arbitrarily large volumes (including lazily decoded ones) never need to fit in memory.
+With verify=True the file is re-loaded with `load_texture` and compared slice by slice
+with the quantized values.
+
+`write_sh_volume` splits (N, 27) network predictions or an `SHVolume` into the seven SH
+textures of a bake (SHCoefficients_* as R8G8B8A8, AmbientVector as FloatR11G11B10), so
+neural and baked lighting can be compared in-engine without a custom import step.
+"""
+import argparse
+import json
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from sh_volume import SH_FLOAT_COUNT, SH_TEXTURE_LAYOUT, SHVolume
+from texture_sampler import (
+  Texture,
+  TextureMetadata,
+  _encode_float_rgb_to_r11g11b10_uint,
+  load_texture,
+  pixel_decoder,
+  pixel_format_info,
+)
+
+
+@dataclass(frozen=True)
+class PixelEncoder:
+  """How float texels turn into the bytes of a pixel format.
+
+  - encode: float (..., channels) -> raw (..., raw_count) of `raw_dtype`, the layout
+    `PixelDecoder` reads back.
+  """
+  raw_dtype: type
+  raw_count: int
+  channels: int
+  encode: Callable[[np.ndarray], np.ndarray]
+
+
+_PIXEL_ENCODERS: Dict[str, PixelEncoder] = {}
+
+
+def register_pixel_encoder(pixel_format: str, encoder: PixelEncoder) -> None:
+  """Register (or replace) the encoder used by `write_texture` for a pixel format."""
+  info = pixel_format_info(pixel_format)
+  if encoder.channels != info.NumComponents:
+    raise ValueError(f"{info.Name} has {info.NumComponents} components, encoder expects {encoder.channels}")
+  _PIXEL_ENCODERS[info.Name] = encoder
+
+
+def _pixel_encoder(pixel_format: str) -> PixelEncoder:
+  encoder = _PIXEL_ENCODERS.get(pixel_format_info(pixel_format).Name)
+  if encoder is None:
+    raise NotImplementedError(f"Writing PixelFormat {pixel_format} is not supported")
+  return encoder
+
+
+def _encode_unorm8(x: np.ndarray) -> np.ndarray:
+  x = np.nan_to_num(np.asarray(x, dtype=np.float32), nan=0.0)
+  return np.rint(np.clip(x, 0.0, 1.0) * 255.0).astype(np.uint8)
+
+
+def _rgba_to_bgra(x: np.ndarray) -> np.ndarray:
+  return x[..., [2, 1, 0, 3]]
+
+
+def _encode_float(x: np.ndarray) -> np.ndarray:
+  return np.asarray(x, dtype=np.float32)
+
+
+def _encode_half(x: np.ndarray) -> np.ndarray:
+  return np.asarray(x, dtype=np.float32).astype(np.float16)
+
+
+def _encode_a2b10g10r10(x: np.ndarray) -> np.ndarray:
+  # DXGI_R10G10B10A2_UNORM: R bits [0..9], G [10..19], B [20..29], A [30..31]
+  x = np.clip(np.nan_to_num(np.asarray(x, dtype=np.float32), nan=0.0), 0.0, 1.0)
+  rgb = np.rint(x[..., :3] * 1023.0).astype(np.uint32)
+  a = np.rint(x[..., 3] * 3.0).astype(np.uint32)
+  packed = rgb[..., 0] | (rgb[..., 1] << np.uint32(10)) | (rgb[..., 2] << np.uint32(20)) | (a << np.uint32(30))
+  return packed[..., None]
+
+
+def _encode_r11g11b10(x: np.ndarray) -> np.ndarray:
+  return _encode_float_rgb_to_r11g11b10_uint(x)[..., None]
+
+
+for _names, _encoder in [
+  (("R8G8B8A8", "R8G8B8A8_UINT"), PixelEncoder(np.uint8, 4, 4, _encode_unorm8)),
+  (("R8", "G8"), PixelEncoder(np.uint8, 1, 1, _encode_unorm8)),
+  (("B8G8R8A8",), PixelEncoder(np.uint8, 4, 4, lambda x: _encode_unorm8(_rgba_to_bgra(x)))),
+  (("R32_FLOAT",), PixelEncoder(np.float32, 1, 1, _encode_float)),
+  (("G32R32F",), PixelEncoder(np.float32, 2, 2, _encode_float)),
+  (("R32G32B32F",), PixelEncoder(np.float32, 3, 3, _encode_float)),
+  (("A32B32G32R32F",), PixelEncoder(np.float32, 4, 4, _encode_float)),
+  (("R16F", "R16F_FILTER"), PixelEncoder(np.float16, 1, 1, _encode_half)),
+  (("G16R16F", "G16R16F_FILTER"), PixelEncoder(np.float16, 2, 2, _encode_half)),
+  (("FloatRGBA",), PixelEncoder(np.float16, 4, 4, _encode_half)),
+  (("A2B10G10R10",), PixelEncoder(np.uint32, 1, 4, _encode_a2b10g10r10)),
+  (("FloatR11G11B10", "FloatRGB"), PixelEncoder(np.uint32, 1, 3, _encode_r11g11b10)),
+]:
+  for _name in _names:
+    register_pixel_encoder(_name, _encoder)
+
+
+def quantize(data: np.ndarray, pixel_format: str) -> np.ndarray:
+  """Float texels as `load_texture` returns them after a round trip through `pixel_format`."""
+  raw = _pixel_encoder(pixel_format).encode(data)
+  decode = pixel_decoder(pixel_format).decode
+  return raw.astype(np.float32) if decode is None else decode(raw)
+
+
+def write_texture(
+  data,
+  bin_path: str | Path,
+  pixel_format: str,
+  json_path: Optional[str | Path] = None,
+  mmap: bool = False,
+  verify: bool = True,
+) -> TextureMetadata:
+  """Write (D, H, W, C) float texels (an array, a `LazyTextureData` or a `Texture`) as .bin + .json.
+
+  - UNORM formats are clamped to [0,1] and rounded to nearest; FloatR11G11B10 rounds to
+    nearest even and clamps negatives to 0.
+  - The volume is encoded and written one depth slice at a time; mmap=True writes through a
+    memory map of the output file instead of sequential writes.
+  - verify=True re-loads the file with `load_texture` and raises ValueError unless every
+    texel equals the quantized input.
+  """
+  if isinstance(data, Texture):
+    data = data.data
+  info = pixel_format_info(pixel_format)
+  encoder = _pixel_encoder(pixel_format)
+  depth, height, width, channels = data.shape
+  if channels != encoder.channels:
+    raise ValueError(f"{info.Name} needs {encoder.channels} channels, got {channels}")
+
+  bin_p = Path(bin_path)
+  json_p = bin_p.with_suffix(".json") if json_path is None else Path(json_path)
+  raw_dtype = np.dtype(encoder.raw_dtype).newbyteorder("<")
+  shape = (depth, height, width, encoder.raw_count)
+
+  if mmap:
+    raw = np.memmap(bin_p, dtype=raw_dtype, mode="w+", shape=shape)
+    for z in range(depth):
+      raw[z] = encoder.encode(data[z])
+    raw.flush()
+    del raw
+  else:
+    with open(bin_p, "wb") as f:
+      for z in range(depth):
+        encoder.encode(data[z]).astype(raw_dtype, copy=False).tofile(f)
+
+  meta = TextureMetadata(
+    width=width,
+    height=height,
+    depth=depth,
+    pixel_format=info.Name,
+    bytes_per_pixel=info.BlockBytes,
+    total_bytes=int(np.prod(shape)) * raw_dtype.itemsize,
+  )
+  with open(json_p, "w", encoding="utf-8") as f:
+    json.dump({
+      "Width": meta.width,
+      "Height": meta.height,
+      "Depth": meta.depth,
+      "PixelFormat": meta.pixel_format,
+      "BytesPerPixel": meta.bytes_per_pixel,
+      "TotalBytes": meta.total_bytes,
+    }, f, indent=2)
+
+  if verify:
+    written = load_texture(bin_p, json_p, mmap=True)
+    for z in range(depth):
+      expected = quantize(data[z], pixel_format)
+      if not np.array_equal(np.asarray(written.data[z]), expected, equal_nan=True):
+        raise ValueError(f"{bin_p}: depth slice {z} does not reload to the quantized values")
+  return meta
+
+
+# Formats the engine uses for the SH textures of a bake
+SH_PIXEL_FORMATS: Dict[str, str] = {
+  file_name: "FloatR11G11B10" if file_name == "AmbientVector" else "R8G8B8A8"
+  for file_name, _ in SH_TEXTURE_LAYOUT.values()
+}
+
+
+class _ChannelView:
+  """(D, H, W, len(channels)) view of some channels of a (D, H, W, 27) volume, read per depth slice."""
+
+  def __init__(self, volume, channels: np.ndarray):
+    self.volume = volume
+    self.channels = channels
+    self.shape = tuple(volume.shape[:3]) + (len(channels),)
+
+  def __getitem__(self, z):
+    return np.asarray(self.volume[z])[..., self.channels]
+
+
+def write_sh_volume(
+  sh,
+  out_dir: str | Path,
+  shape: Optional[Tuple[int, int, int]] = None,
+  copy_from: Optional[str | Path] = None,
+  mmap: bool = False,
+  verify: bool = True,
+) -> Dict[str, TextureMetadata]:
+  """Write SH values as the seven SH textures of a bake.
+
+  - sh: an `SHVolume`, a (D, H, W, 27) array, or (D*H*W, 27) predictions in texture order
+    (x fastest, z slowest) together with their (D, H, W) `shape`.
+  - copy_from: bake directory whose other textures (IndirectionTexture, SkyBentNormal, ...)
+    are copied alongside, so `out_dir` is a complete bake.
+  """
+  if isinstance(sh, SHVolume):
+    sh = sh.data
+  if sh.ndim == 2:
+    if shape is None:
+      raise ValueError("shape (D, H, W) is required for flat (N, 27) SH values")
+    sh = sh.reshape(tuple(shape) + (SH_FLOAT_COUNT,))
+  if sh.shape[-1] != SH_FLOAT_COUNT:
+    raise ValueError(f"Expected {SH_FLOAT_COUNT} SH floats per texel, got {sh.shape[-1]}")
+
+  out_p = Path(out_dir)
+  out_p.mkdir(parents=True, exist_ok=True)
+  if copy_from is not None:
+    written = {file_name for file_name, _ in SH_TEXTURE_LAYOUT.values()}
+    for src_bin in Path(copy_from).glob("*.bin"):
+      if src_bin.stem in written:
+        continue
+      for src in (src_bin, src_bin.with_suffix(".json")):
+        dst = out_p / src.name
+        if dst.resolve() != src.resolve(): # copy_from may be out_dir itself
+          shutil.copy2(src, dst)
+
+  metas = {}
+  for file_name, channels in SH_TEXTURE_LAYOUT.values():
+    metas[file_name] = write_texture(
+      _ChannelView(sh, channels), out_p / (file_name + ".bin"), SH_PIXEL_FORMATS[file_name],
+      mmap=mmap, verify=verify,
+    )
+  return metas
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Write a NeuralSH checkpoint's predictions as an engine bake.")
+  parser.add_argument("checkpoint", nargs="?", default="best_model.pth")
+  parser.add_argument("output", nargs="?", default="NeuralLightmapsData")
+  parser.add_argument("--data", default="LightmapsData", help="bake whose probe grid is predicted and whose other textures are copied")
+  parser.add_argument("--angle", type=float, default=0.0)
+  parser.add_argument("--mmap", action="store_true")
+  args = parser.parse_args()
+
+  from evaluate import probe_centers
+  from inference import NeuralSHInference
+
+  volume = SHVolume.load(args.data, mmap=True)
+  shape = (volume.meta.depth, volume.meta.height, volume.meta.width)
+  positions = probe_centers(shape)
+  engine = NeuralSHInference.from_checkpoint(args.checkpoint)
+  sh = engine(positions, np.full((positions.shape[0], 1), args.angle, dtype=np.float32))
+  metas = write_sh_volume(sh, args.output, shape=shape, copy_from=args.data, mmap=args.mmap)
+  for file_name, meta in metas.items():
+    print(f"wrote {file_name}: {meta.pixel_format} {meta.width}x{meta.height}x{meta.depth}, {meta.total_bytes} bytes")
+
+
+if __name__ == "__main__":
+  main()
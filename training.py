@@ -0,0 +1,194 @@
+"""Device-resident training loop for NeuralSH.
+
+The notebook's `train()` goes through `SHDataset` + `DataLoader`, which indexes and
+collates one sample at a time in Python, moves every batch to the device and calls
+`loss.item()` (a blocking sync) after every step. For datasets of a few thousand rows
+that overhead dominates the MLP math. `train_fast` keeps the whole dataset as stacked
+tensors on the target device, shuffles with one `randperm` per epoch, slices batches
+directly and accumulates the loss on the device, only syncing to log.
+
+`train_streaming` has the same contract for datasets that do not fit in memory: it streams
+shuffled batches from a `bake_dataset.ShardedSHDataset` instead.
+"""
+import time
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import torch
+from torch import nn
+
+from bake_dataset import ShardedSHDataset
+
+
+Batch = Tuple[torch.Tensor, torch.Tensor, torch.Tensor] # (pos, angle, target) on the device
+
+
+def _as_tensor(x, device) -> torch.Tensor:
+  return torch.as_tensor(np.asarray(x), dtype=torch.float32, device=device)
+
+
+def train_epoch(model: nn.Module, criterion: nn.Module, optimizer: torch.optim.Optimizer, batches: Iterable[Batch]) -> Tuple[torch.Tensor, int]:
+  """One optimizer step per batch; returns (mean loss as a device tensor, number of steps) without syncing."""
+  model.train()
+  loss_sum = torch.zeros((), device=next(model.parameters()).device)
+  steps = 0
+  for pos, angle, target in batches:
+    optimizer.zero_grad(set_to_none=True)
+    loss = criterion(model(pos, angle), target)
+    loss.backward()
+    optimizer.step()
+    loss_sum += loss.detach()
+    steps += 1
+  return loss_sum / max(steps, 1), steps
+
+
+def _fit(
+  model: nn.Module,
+  epoch_batches: Callable[[], Iterator[Batch]],
+  val_data: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]],
+  epochs: int,
+  lr: float,
+  patience: int,
+  device,
+  log_every: int,
+  checkpoint_path,
+):
+  # Adam + SmoothL1 with early stopping on the validation loss, like the notebook's train().
+  # `epoch_batches()` returns the batches of one epoch.
+  criterion = nn.SmoothL1Loss()
+  optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+
+  if val_data is not None:
+    val_pos, val_angle, val_target = (_as_tensor(x, device) for x in val_data)
+    val_pos, val_angle = val_pos.view(-1, 3), val_angle.view(-1, 1)
+
+  train_losses = torch.zeros(epochs, device=device)
+  val_losses = torch.full((epochs,), float("nan"), device=device)
+  early_stopping = (patience != 0) and val_data is not None
+  best_val_loss = float("inf")
+  epochs_no_improve = 0
+  epochs_run = 0
+  steps = 0
+
+  start_time = time.perf_counter()
+  for epoch in range(epochs):
+    # Training
+    train_losses[epoch], epoch_steps = train_epoch(model, criterion, optimizer, epoch_batches())
+    steps += epoch_steps
+    epochs_run = epoch + 1
+
+    # Validation
+    if val_data is not None:
+      model.eval()
+      with torch.no_grad():
+        val_losses[epoch] = criterion(model(val_pos, val_angle), val_target)
+
+    if (epoch + 1) % log_every == 0 or epoch + 1 == epochs:
+      elapsed = time.perf_counter() - start_time
+      print(f"Epoch [{epoch+1}/{epochs}] "
+            f"Train Loss: {train_losses[epoch].item():.6f} "
+            f"Val Loss: {val_losses[epoch].item():.6f} "
+            f"({steps / elapsed:.1f} steps/s)")
+
+    if early_stopping: # early stopping based on validation loss
+      avg_val_loss = val_losses[epoch].item()
+      if avg_val_loss < best_val_loss:
+        best_val_loss = avg_val_loss
+        epochs_no_improve = 0
+        torch.save(model.state_dict(), checkpoint_path)
+      else:
+        epochs_no_improve += 1
+        if epochs_no_improve >= patience:
+          print(f"Early stopping triggered after {epoch+1} epochs.")
+          model.load_state_dict(torch.load(checkpoint_path))
+          break
+
+  history = {
+    "train_loss": train_losses[:epochs_run].tolist(), # syncs the device
+    "val_loss": val_losses[:epochs_run].tolist(),
+  }
+  elapsed = time.perf_counter() - start_time
+  history["steps_per_sec"] = steps / elapsed
+  print(f"{steps} steps in {elapsed:.2f}s ({history['steps_per_sec']:.1f} steps/s on {device})")
+
+  if not early_stopping: # save model at the end
+    torch.save(model.state_dict(), checkpoint_path)
+
+  return model, history
+
+
+def train_fast(
+  model: nn.Module,
+  positions: np.ndarray,
+  light_angles: np.ndarray,
+  spherical_harmonics: np.ndarray,
+  val_data: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+  epochs=100,
+  lr=1e-3,
+  patience=10,
+  batch_size=128,
+  device="cpu",
+  log_every=100,
+  checkpoint_path="best_model.pth",
+  seed: Optional[int] = None,
+):
+  """Same contract as the notebook's `train()` (SmoothL1 loss, Adam, early stopping on the
+  validation loss, checkpointing to `checkpoint_path`), fed from arrays instead of loaders.
+
+  - val_data: optional (positions, light_angles, spherical_harmonics) evaluated as one batch.
+  - Losses are only copied to the host every `log_every` epochs (and every epoch when early
+    stopping needs the validation loss).
+  - Returns (model, history); history["steps_per_sec"] is the measured training throughput.
+  """
+  model = model.to(device)
+  pos = _as_tensor(positions, device).view(-1, 3)
+  angle = _as_tensor(light_angles, device).view(-1, 1)
+  target = _as_tensor(spherical_harmonics, device)
+  assert pos.shape[0] == angle.shape[0] == target.shape[0]
+
+  n = pos.shape[0]
+  generator = torch.Generator(device=device)
+  if seed is not None:
+    generator.manual_seed(seed)
+  else:
+    generator.seed()
+
+  def epoch_batches() -> Iterator[Batch]:
+    perm = torch.randperm(n, device=device, generator=generator)
+    pos_epoch, angle_epoch, target_epoch = pos[perm], angle[perm], target[perm]
+    for start in range(0, n, batch_size):
+      stop = start + batch_size
+      yield pos_epoch[start:stop], angle_epoch[start:stop], target_epoch[start:stop]
+
+  return _fit(model, epoch_batches, val_data, epochs, lr, patience, device, log_every, checkpoint_path)
+
+
+def train_streaming(
+  model: nn.Module,
+  dataset: ShardedSHDataset,
+  val_data: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+  epochs=100,
+  lr=1e-3,
+  patience=10,
+  batch_size=128,
+  device="cpu",
+  log_every=1,
+  checkpoint_path="best_model.pth",
+  window=2,
+  seed: Optional[int] = None,
+):
+  """`train_fast` fed from memory-mapped shards instead of in-memory arrays.
+
+  Each epoch visits every row once through `dataset.iter_batches`; at most `window` shards
+  are held in host memory at a time. Returns (model, history) like `train_fast`.
+  """
+  model = model.to(device)
+  rng = np.random.default_rng(seed)
+  if seed is not None:
+    torch.manual_seed(seed)
+
+  def epoch_batches() -> Iterator[Batch]:
+    for pos, angle, target in dataset.iter_batches(batch_size, shuffle=True, window=window, rng=rng):
+      yield _as_tensor(pos, device), _as_tensor(angle, device), _as_tensor(target, device)
+
+  return _fit(model, epoch_batches, val_data, epochs, lr, patience, device, log_every, checkpoint_path)
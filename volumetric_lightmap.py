@@ -0,0 +1,91 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from sh_volume import SHVolume
+from texture_sampler import Texture, load_texture_by_name, sample_uvw_batch
+
+
+# UE default (FVolumetricLightmapSettings::BrickSize); bricks are stored with one texel of padding
+DEFAULT_BRICK_SIZE = 4
+
+
+@dataclass
+class VolumetricLightmap:
+  """World position -> SH sampler for an Unreal volumetric lightmap.
+
+  Mirrors ComputeVolumetricLightmapBrickTextureUVs from VolumetricLightmapShared.ush:
+  a world position maps to a cell of the indirection volume, whose texel stores the
+  brick's position in the atlas (xyz, in bricks) and the brick's size (w, in indirection
+  cells). The brick texel is then sampled from the atlas (SH volume,
+  DirectionalLightShadowing, SkyBentNormal, ...).
+  """
+  indirection: np.ndarray # (Di, Hi, Wi, 4) uint8: brick atlas offset xyz + brick size
+  sh: SHVolume # brick atlas
+  world_to_uv_scale: np.ndarray # (3,) View.VolumetricLightmapWorldToUVScale
+  world_to_uv_add: np.ndarray # (3,) View.VolumetricLightmapWorldToUVAdd
+  brick_size: int = DEFAULT_BRICK_SIZE
+
+  @classmethod
+  def load(
+    cls,
+    tex_dir: str | Path,
+    world_to_uv_scale=(1.0, 1.0, 1.0),
+    world_to_uv_add=(0.0, 0.0, 0.0),
+    brick_size: int = DEFAULT_BRICK_SIZE,
+    mmap: bool = False,
+  ) -> "VolumetricLightmap":
+    """Load the indirection texture and the SH brick atlas of a bake.
+
+    The default transform treats positions as already normalized to the indirection volume ([0,1]^3).
+    """
+    # R8G8B8A8_UINT: keep the raw integer codes, they are not normalized colors
+    indirection = load_texture_by_name(tex_dir, "IndirectionTexture", native=True).data
+    return cls(
+      indirection=np.ascontiguousarray(indirection, dtype=np.uint8),
+      sh=SHVolume.load(tex_dir, mmap=mmap),
+      world_to_uv_scale=np.asarray(world_to_uv_scale, dtype=np.float32),
+      world_to_uv_add=np.asarray(world_to_uv_add, dtype=np.float32),
+      brick_size=brick_size,
+    )
+
+  @property
+  def indirection_size(self) -> np.ndarray:
+    depth, height, width, _ = self.indirection.shape
+    return np.array([width, height, depth], dtype=np.float32)
+
+  @property
+  def brick_texel_size(self) -> np.ndarray:
+    return 1.0 / np.array([self.sh.meta.width, self.sh.meta.height, self.sh.meta.depth], dtype=np.float32)
+
+  def brick_uvs(self, positions: np.ndarray) -> np.ndarray:
+    """Atlas UVWs for (N, 3) world positions, returns (N, 3) float32.
+
+    Raises ValueError for positions in unmapped indirection cells (brick size w == 0), which
+    the shader would turn into NaN UVs.
+    """
+    positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+    indirection_uvs = np.clip(positions * self.world_to_uv_scale + self.world_to_uv_add, 0.0, 0.99)
+    texel_coord = indirection_uvs * self.indirection_size
+
+    cell = texel_coord.astype(np.intp) # Load(int4(...)) truncates; coordinates are non-negative
+    brick = self.indirection[cell[:, 2], cell[:, 1], cell[:, 0]].astype(np.float32)
+    brick_offset, brick_cells = brick[:, :3], brick[:, 3:4]
+    unmapped = brick_cells[:, 0] == 0
+    if unmapped.any():
+      z, y, x = cell[np.argmax(unmapped)][::-1]
+      raise ValueError(f"{int(unmapped.sum())} positions fall in unmapped indirection cells, e.g. cell (x={x}, y={y}, z={z})")
+
+    padded_brick_size = self.brick_size + 1
+    local = texel_coord / brick_cells
+    local -= np.floor(local)
+    return (brick_offset * padded_brick_size + local * self.brick_size + 0.5) * self.brick_texel_size
+
+  def sample(self, positions: np.ndarray, method: str = "trilinear") -> np.ndarray:
+    """SH (N, 27) at (N, 3) world positions."""
+    return self.sh.sample(self.brick_uvs(positions), method=method)
+
+  def sample_atlas(self, tex: Texture, positions: np.ndarray, method: str = "trilinear") -> np.ndarray:
+    """Sample another brick atlas texture of the same bake (e.g. SkyBentNormal) at world positions."""
+    return sample_uvw_batch(tex, self.brick_uvs(positions), method=method)